@@ -0,0 +1,258 @@
+"""
+Admission control: per-client rate limiting and a cap on concurrent requests.
+
+Per-client rate limiting is opt-in: with RATE_LIMIT_PER_SECOND set, each
+client has a token bucket refilled at that rate up to RATE_LIMIT_BURST
+tokens, and a request finding it empty gets 429 with a Retry-After of when
+the next token arrives. Clients are identified by their X-API-Key header
+when it is one of RATE_LIMIT_API_KEYS, otherwise by IP address. Behind
+reverse proxies (Railway, Render and other load balancers), the socket
+address is the proxy's, so set RATE_LIMIT_TRUSTED_HOPS to the number of
+proxies in front of the app: the client is then the address the outermost
+trusted proxy appended to X-Forwarded-For, i.e. that many entries from the
+right. Entries further left are whatever the client sent and are ignored.
+Buckets are kept in an LRU map of at most RATE_LIMIT_MAX_CLIENTS entries,
+so a check is a dict lookup and a little arithmetic, and memory stays
+bounded however many addresses appear.
+
+At most MAX_CONCURRENT_REQUESTS are served at once. Up to
+MAX_QUEUED_REQUESTS more wait their turn, first come first served, for at
+most QUEUE_TIMEOUT_MS; anything beyond that gets 503 straight away rather
+than piling up in front of the MongoDB connection pool.
+
+    RATE_LIMIT_PER_SECOND=20 RATE_LIMIT_TRUSTED_HOPS=1   per-client limit behind one proxy
+    MAX_CONCURRENT_REQUESTS=0                            no concurrency cap
+
+/metrics is never limited, so monitoring keeps working under load.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+RATE_LIMIT_PER_SECOND = float(os.environ.get("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", "60"))
+RATE_LIMIT_MAX_CLIENTS = int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", "10000"))
+RATE_LIMIT_API_KEYS = frozenset(
+    key.strip() for key in os.environ.get("RATE_LIMIT_API_KEYS", "").split(",") if key.strip()
+)
+RATE_LIMIT_TRUSTED_HOPS = int(os.environ.get("RATE_LIMIT_TRUSTED_HOPS", "0"))
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("MAX_CONCURRENT_REQUESTS", "64"))
+MAX_QUEUED_REQUESTS = int(os.environ.get("MAX_QUEUED_REQUESTS", "256"))
+QUEUE_TIMEOUT_MS = float(os.environ.get("QUEUE_TIMEOUT_MS", "1000"))
+
+API_KEY_HEADER = b"x-api-key"
+EXEMPT_PATHS = frozenset({"/metrics"})
+
+# Decisions, as counted in stats() and labelled on /metrics
+ADMITTED = "admitted"  # a slot was free
+QUEUED = "queued"  # admitted after waiting for a slot
+RATE_LIMITED = "rate_limited"  # 429
+QUEUE_FULL = "queue_full"  # 503
+QUEUE_TIMEOUT = "queue_timeout"  # 503
+DECISIONS = (ADMITTED, QUEUED, RATE_LIMITED, QUEUE_FULL, QUEUE_TIMEOUT)
+
+
+class TokenBuckets:
+    """One token bucket per client, in an LRU map of at most `max_clients`
+
+    A bucket is only topped up when its client is seen, from the time
+    elapsed since, so idle clients cost nothing until they are evicted.
+    """
+
+    def __init__(self, rate, burst, max_clients, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets = OrderedDict()  # client -> (tokens, last refill)
+        self.evictions = 0
+
+    def take(self, client):
+        """0.0 when `client` may proceed, otherwise the seconds until it may"""
+        now = self._clock()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            tokens = self.burst
+            if len(self._buckets) >= self.max_clients:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            tokens, refilled = bucket
+            tokens = min(self.burst, tokens + (now - refilled) * self.rate)
+            self._buckets.move_to_end(client)
+        if tokens >= 1:
+            self._buckets[client] = (tokens - 1, now)
+            return 0.0
+        self._buckets[client] = (tokens, now)
+        return (1 - tokens) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ConcurrencyLimit:
+    """At most `limit` holders at once, and a FIFO queue of at most `max_queued` waiters
+
+    A released slot goes straight to the oldest waiter still waiting, so
+    newcomers cannot overtake the queue. Waiters that timed out or went away
+    are skipped when they come up.
+    """
+
+    def __init__(self, limit, max_queued, timeout):
+        self.limit = limit
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.active = 0
+        self.queued = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        """ADMITTED or QUEUED once a slot is held (call `release` after), else QUEUE_FULL or QUEUE_TIMEOUT"""
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return ADMITTED
+        if self.queued >= self.max_queued:
+            return QUEUE_FULL
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        timer = loop.call_later(self.timeout, self._expire, waiter)
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            granted = await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self.queued -= 1
+            elif waiter.result():
+                self.release()  # handed a slot just as the caller went away
+            raise
+        finally:
+            timer.cancel()
+        return QUEUED if granted else QUEUE_TIMEOUT
+
+    def _expire(self, waiter):
+        if not waiter.done():
+            self.queued -= 1
+            waiter.set_result(False)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.queued -= 1
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+
+class AdmissionControl:
+    """Rate limiting and concurrency cap state shared by every request of this worker"""
+
+    def __init__(self, rate=RATE_LIMIT_PER_SECOND, burst=RATE_LIMIT_BURST, max_clients=RATE_LIMIT_MAX_CLIENTS,
+                 api_keys=RATE_LIMIT_API_KEYS, trusted_hops=RATE_LIMIT_TRUSTED_HOPS,
+                 max_concurrent=MAX_CONCURRENT_REQUESTS, max_queued=MAX_QUEUED_REQUESTS,
+                 queue_timeout_ms=QUEUE_TIMEOUT_MS):
+        self.buckets = TokenBuckets(rate, burst, max_clients) if rate > 0 else None
+        self.limit = ConcurrencyLimit(max_concurrent, max_queued, queue_timeout_ms / 1000) if max_concurrent > 0 else None
+        self.api_keys = api_keys
+        self.trusted_hops = trusted_hops
+        self.decisions = dict.fromkeys(DECISIONS, 0)
+        self.queue_wait_seconds = 0.0
+
+    def client(self, scope):
+        """The rate limiting key for a request: a known API key, or the client's address"""
+        forwarded = []
+        for name, value in scope["headers"]:
+            if name == API_KEY_HEADER and self.api_keys:
+                key = value.decode("latin-1")
+                if key in self.api_keys:
+                    return f"key:{key}"
+            elif name == b"x-forwarded-for" and self.trusted_hops:
+                forwarded += [entry.strip() for entry in value.decode("latin-1").split(",")]
+        # Each trusted proxy appends the address it received from; only those entries can be believed
+        if self.trusted_hops and len(forwarded) >= self.trusted_hops and forwarded[-self.trusted_hops]:
+            return f"ip:{forwarded[-self.trusted_hops]}"
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "ip:unknown"
+
+    async def admit(self, scope):
+        """(decision, Retry-After seconds for a rejection); an admitted request must be `release`d"""
+        if self.buckets is not None:
+            wait = self.buckets.take(self.client(scope))
+            if wait:
+                self.decisions[RATE_LIMITED] += 1
+                return RATE_LIMITED, max(1, math.ceil(wait))
+        if self.limit is None:
+            self.decisions[ADMITTED] += 1
+            return ADMITTED, None
+        start = time.perf_counter()
+        decision = await self.limit.acquire()
+        if decision != ADMITTED:
+            self.queue_wait_seconds += time.perf_counter() - start
+        self.decisions[decision] += 1
+        return decision, 1 if decision in (QUEUE_FULL, QUEUE_TIMEOUT) else None
+
+    def release(self):
+        if self.limit is not None:
+            self.limit.release()
+
+    def stats(self):
+        return {
+            "decisions": dict(self.decisions),
+            "queueWaitSeconds": round(self.queue_wait_seconds, 6),
+            "active": self.limit.active if self.limit else 0,
+            "queued": self.limit.queued if self.limit else 0,
+            "clients": len(self.buckets) if self.buckets else 0,
+            "clientEvictions": self.buckets.evictions if self.buckets else 0,
+        }
+
+
+REJECTIONS = {
+    RATE_LIMITED: (429, "Too many requests, slow down"),
+    QUEUE_FULL: (503, "Server busy, try again shortly"),
+    QUEUE_TIMEOUT: (503, "Server busy, try again shortly"),
+}
+
+
+async def reject(send, decision, retry_after):
+    status, detail = REJECTIONS[decision]
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+admission_control = AdmissionControl()
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware answering 429 / 503 before a request reaches the app when it is over its limits"""
+
+    def __init__(self, app, control=admission_control):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        decision, retry_after = await self.control.admit(scope)
+        if decision in REJECTIONS:
+            await reject(send, decision, retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.control.release()
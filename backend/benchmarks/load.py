@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the read API, with JSON results that can be compared run to run.
+
+    cd backend
+    python -m benchmarks.load --in-process --seed-scale 200               # no MongoDB needed
+    python -m benchmarks.load --concurrency 64 --duration 15              # starts uvicorn on MONGO_URL
+    python -m benchmarks.load --url http://localhost:8001 --rate 500      # open loop, existing server
+    python -m benchmarks.load --in-process --compare benchmarks/results/load-<earlier>.json
+
+The target is one of
+  * an existing server (`--url`),
+  * the app started here under uvicorn against MONGO_URL/DB_NAME (default), or
+  * the app driven in-process through ASGI on the in-memory storage engine
+    (`--in-process`); this measures the application code alone, without
+    network or database latency.
+
+Every endpoint is measured separately, after a warm-up, either closed loop
+(`--concurrency` workers issuing back-to-back requests) or open loop
+(`--rate` arrivals per second, independent of how fast responses come
+back; latency is measured from each request's scheduled start so a stalled
+server is not hidden by coordinated omission).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from benchmarks.write_latency import summarize
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+DEFAULT_ENDPOINTS = (
+    "/api/personal-info",
+    "/api/projects",
+    "/api/projects/featured",
+    "/api/projects?limit=20",
+    "/api/projects/filter?technologies=Python&limit=20",
+    "/api/skills",
+    "/api/skills/grouped",
+    "/api/portfolio",
+    "/api/search?q=python",
+)
+
+
+async def closed_loop(send, concurrency, duration):
+    """`concurrency` workers sending back to back for `duration` seconds"""
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await send()
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started, 0
+
+
+async def open_loop(send, rate, duration, max_in_flight, poisson=False):
+    """Requests started at `rate` per second whatever the response times; beyond `max_in_flight` they are dropped"""
+    latencies, statuses = [], {}
+    in_flight = 0
+    dropped = 0
+
+    async def timed(scheduled):
+        nonlocal in_flight
+        status = await send()
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+        in_flight -= 1
+
+    tasks = []
+    started = time.perf_counter()
+    scheduled = started
+    while scheduled < started + duration:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= max_in_flight:
+            dropped += 1
+        else:
+            in_flight += 1
+            tasks.append(asyncio.create_task(timed(scheduled)))
+        scheduled += random.expovariate(rate) if poisson else 1 / rate
+    await asyncio.gather(*tasks)
+    return latencies, statuses, time.perf_counter() - started, dropped
+
+
+def request_sender(client, path, headers):
+    async def send():
+        try:
+            response = await client.get(path, headers=headers)
+            return response.status_code
+        except httpx.HTTPError as e:
+            return type(e).__name__
+    return send
+
+
+async def measure(client, path, args):
+    headers = {"Accept-Encoding": args.accept_encoding} if args.accept_encoding else {}
+    send = request_sender(client, path, headers)
+    for _ in range(args.warmup):
+        await send()
+    if args.rate:
+        result = await open_loop(send, args.rate, args.duration, args.max_in_flight, poisson=args.poisson)
+    else:
+        result = await closed_loop(send, args.concurrency, args.duration)
+    latencies, statuses, elapsed, dropped = result
+    if not latencies:
+        return {"endpoint": path, "requests": 0, "dropped": dropped}
+    stats = summarize(latencies, elapsed)
+    errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        "endpoint": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "dropped": dropped,
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "maxMs": max(latencies),
+        "meanMs": stats["mean"],
+        "p50Ms": stats["p50"],
+        "p95Ms": stats["p95"],
+        "p99Ms": stats["p99"],
+        "throughput": stats["throughput"],
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"❌ Server exited with code {process.returncode}")
+            try:
+                if (await client.get(f"{url}/api/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"❌ Server did not come up within {timeout}s")
+
+
+class LocalServer:
+    """uvicorn running the app in a child process, against MONGO_URL/DB_NAME"""
+
+    def __init__(self, workers=1):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.workers = workers
+        self.process = None
+
+    async def __aenter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+        )
+        await wait_until_up(self.url, self.process)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class InProcessApp:
+    """The ASGI app with its lifespan run here, on the in-memory storage engine"""
+
+    def __init__(self, seed_scale=None):
+        self.seed_scale = seed_scale
+
+    async def __aenter__(self):
+        import database
+        database.STORAGE_ENGINE = "memory"  # the lifespan seeds it with the base content
+        import seed_data
+        import server
+        self.app = server.app
+        self._lifespan = server.lifespan(self.app)
+        await self._lifespan.__aenter__()
+        if self.seed_scale:
+            db = self.app.state.db
+            await seed_data.seed_database(scale=self.seed_scale, db=db)
+            await server.search_index.build(db)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._lifespan.__aexit__(*exc_info)
+
+
+def compare(previous, current):
+    """Print p50/p99/throughput changes per endpoint against an earlier results file"""
+    earlier = {row["endpoint"]: row for row in previous["results"]}
+    print(f"\n{'endpoint':52} {'p50 Δ':>9} {'p99 Δ':>9} {'req/s Δ':>9}")
+    for row in current["results"]:
+        before = earlier.get(row["endpoint"])
+        if not before or not before.get("requests") or not row.get("requests"):
+            continue
+
+        def change(key):
+            return f"{(row[key] - before[key]) / before[key] * 100:+8.1f}%" if before[key] else "       -"
+
+        print(f"{row['endpoint']:52} {change('p50Ms')} {change('p99Ms')} {change('throughput')}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test the read API and write JSON results")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="benchmark an already running server")
+    target.add_argument("--in-process", action="store_true", help="drive the app through ASGI on an in-memory database")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when starting the server here")
+    parser.add_argument("--endpoints", help="comma-separated paths (default: the main read endpoints)")
+    parser.add_argument("--concurrency", type=int, default=32, help="closed-loop workers")
+    parser.add_argument("--rate", type=float, help="open-loop arrivals per second instead of closed loop")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times in open loop")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="open-loop requests outstanding before dropping")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="requests per endpoint before measuring")
+    parser.add_argument("--accept-encoding", default="gzip, br", help="Accept-Encoding header ('' for none)")
+    parser.add_argument("--seed-scale", type=int,
+                        help="seed MONGO_URL (or the in-process database) with N extra synthetic documents per collection")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # the app's logging config would log every request
+
+    endpoints = [path.strip() for path in args.endpoints.split(",")] if args.endpoints else list(DEFAULT_ENDPOINTS)
+    mode = f"open loop {args.rate:g} req/s" if args.rate else f"closed loop x{args.concurrency}"
+    limits = httpx.Limits(max_connections=args.max_in_flight if args.rate else args.concurrency)
+
+    # All load comes from one address, which the per-client rate limit would throttle
+    os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+    if args.in_process:
+        target_name = "in-process"
+        context = InProcessApp(args.seed_scale)
+    else:
+        if args.seed_scale is not None:
+            # Before the server starts, so it builds its search index from the seeded data
+            import seed_data
+            await seed_data.seed_database(scale=args.seed_scale)
+        target_name = args.url or "local uvicorn"
+        context = contextlib.nullcontext() if args.url else LocalServer(args.workers)
+
+    results = []
+    async with context as running:
+        if args.in_process:
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=running.app), base_url="http://bench")
+        else:
+            client = httpx.AsyncClient(base_url=args.url or running.url, limits=limits, timeout=30)
+        async with client:
+            print(f"⏱️  {target_name}, {mode}, {args.duration:g}s per endpoint\n")
+            print(f"{'endpoint':52} {'req':>7} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>9}")
+            for path in endpoints:
+                row = await measure(client, path, args)
+                results.append(row)
+                if row["requests"]:
+                    print(f"{path:52} {row['requests']:7} {row['errors'] + row['dropped']:5} {row['p50Ms']:8.2f} "
+                          f"{row['p95Ms']:8.2f} {row['p99Ms']:8.2f} {row['throughput']:9.0f}")
+                else:
+                    print(f"{path:52} {'no completed requests':>40}")
+    print("\n(latencies in ms; err counts non-2xx/3xx responses, transport errors and open-loop drops)")
+
+    run = {
+        "startedAt": datetime.utcnow().isoformat(),
+        "target": target_name,
+        "mode": mode,
+        "settings": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fastJson": os.environ.get("FAST_JSON", ""),
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2))
+    print(f"📄 Results written to {output}")
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), run)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Serialization micro-benchmark, per model, for a list response of N documents.
+
+    cd backend && python -m benchmarks.serialization --documents 500
+
+Compares FastAPI's default response path (validate against the response
+model, jsonable_encoder, json.dumps), the validated pydantic-core path used
+by the response cache, and the trusted orjson path enabled by FAST_JSON=1.
+No database is needed: documents come from the seed data generators.
+"""
+import argparse
+import json
+import timeit
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import seed_data
+from models import Experience, Project, Skill, Education, Achievement
+from serialization import dump_trusted, orjson
+
+GENERATORS = {
+    Experience: seed_data.synthetic_experience,
+    Project: seed_data.synthetic_projects,
+    Skill: seed_data.synthetic_skills,
+    Education: seed_data.synthetic_education,
+    Achievement: seed_data.synthetic_achievements,
+}
+
+
+def stored_documents(model, count):
+    """Documents shaped as Motor returns them: validated on write, plus `_id`"""
+    documents = []
+    for data in GENERATORS[model](count):
+        document = model(**data).dict()
+        document["_id"] = str(ObjectId())
+        documents.append(document)
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-model serialization micro-benchmark")
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    if orjson is None:
+        raise SystemExit("orjson is required for the fast path: pip install orjson")
+
+    print(f"⏱️  {args.documents} documents per response, best of 3 x {args.repeat} runs\n")
+    print(f"{'model':12} {'fastapi default':>16} {'validated':>10} {'trusted':>10} {'speedup':>8}")
+    for model in GENERATORS:
+        response_type = List[model]
+        adapter = TypeAdapter(response_type)
+        documents = stored_documents(model, args.documents)
+
+        def fastapi_default():
+            return json.dumps(jsonable_encoder(adapter.validate_python(documents))).encode()
+
+        def validated():
+            return adapter.dump_json(adapter.validate_python(documents))
+
+        def trusted():
+            return dump_trusted(response_type, documents)[1]
+
+        assert validated() == trusted(), f"{model.__name__}: trusted output differs"
+
+        timings = [
+            min(timeit.repeat(candidate, number=args.repeat, repeat=3)) / args.repeat * 1000
+            for candidate in (fastapi_default, validated, trusted)
+        ]
+        print(
+            f"{model.__name__:12} {timings[0]:13.2f} ms {timings[1]:7.2f} ms {timings[2]:7.2f} ms "
+            f"{timings[0] / timings[2]:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Storage engine benchmark: the same repository operations on each engine.
+
+    cd backend
+    python -m benchmarks.storage                          # memory and SQLite, plus MongoDB if reachable
+    python -m benchmarks.storage --documents 5000 --engines memory,sqlite
+    python -m benchmarks.storage --concurrency 16 --operations 5000
+
+MongoDB runs against MONGO_URL in a scratch `<DB_NAME>_storage_bench`
+database, and SQLite against a temporary file; both are removed
+afterwards. The collection holds `--documents` synthetic projects, and
+every scenario issues the query the matching API endpoint does. Results
+are also written to benchmarks/results/storage-<timestamp>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.write_latency import run, summarize
+from database import COLLECTION_NAMES, connect
+from facets import facet_counts, facet_query
+from models import Project
+from pagination import CREATED_AT_KEYSET, fetch_page
+from seed_data import synthetic_projects
+from storage import Insert, MemoryStorage, SQLiteStorage
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ENGINES = ("memory", "sqlite", "mongo")
+
+
+async def open_engine(engine, directory):
+    if engine == "memory":
+        return MemoryStorage(COLLECTION_NAMES), None
+    if engine == "sqlite":
+        return SQLiteStorage(Path(directory) / "bench.sqlite3", COLLECTION_NAMES), None
+    name = f"{os.environ.get('DB_NAME', 'portfolio_db')}_storage_bench"
+    db = connect(database_name=name, serverSelectionTimeoutMS=2000)
+    await db.warm_up()
+    await db.database.drop_collection("projects")
+    await db.database["projects"].create_index("id", unique=True)
+    await db.database["projects"].create_index(CREATED_AT_KEYSET.sort)
+    return db, lambda: db.client.drop_database(name)
+
+
+def scenarios(projects, ids, counter):
+    """(name, zero-argument coroutine function, reads the whole collection) in the order they run"""
+    middle = ids[len(ids) // 2]
+    filters = {"technologies": ["Python"]}
+    inserted = []
+
+    def next_id():
+        return ids[next(counter) % len(ids)]
+
+    async def keyset_page():
+        document = await projects.find_one({"id": middle})
+        await fetch_page(projects, {}, CREATED_AT_KEYSET, CREATED_AT_KEYSET.encode(document), 20)
+
+    async def insert():
+        document = Project(**next(synthetic_projects(1))).dict()
+        inserted.append(document["id"])
+        await projects.insert(document)
+
+    async def delete():
+        if inserted:
+            await projects.delete({"id": inserted.pop()})
+
+    return [
+        ("find all (sorted)", lambda: projects.find({}, sort=CREATED_AT_KEYSET.sort), True),
+        ("first page (limit 20)", lambda: fetch_page(projects, {}, CREATED_AT_KEYSET, None, 20), False),
+        ("keyset page (mid-list)", keyset_page, False),
+        ("filter page (technologies)",
+         lambda: fetch_page(projects, facet_query(filters), CREATED_AT_KEYSET, None, 20), False),
+        ("facet counts", lambda: facet_counts(projects, filters), True),
+        ("find_one by id", lambda: projects.find_one({"id": next_id()}), False),
+        ("count (filtered)", lambda: projects.count({"isFeatured": True}), False),
+        ("insert", insert, False),
+        ("update by id",
+         lambda: projects.update({"id": next_id()}, {"title": "Updated", "updatedAt": datetime.utcnow()}), False),
+        ("delete by id", delete, False),
+    ]
+
+
+async def bench_engine(engine, args, directory):
+    try:
+        storage, cleanup = await open_engine(engine, directory)
+    except Exception as e:
+        print(f"⚠️  {engine}: unavailable ({type(e).__name__}); skipped\n")
+        return None
+    projects = storage.projects
+    rows = []
+    try:
+        documents = [Project(**data).dict() for data in synthetic_projects(args.documents)]
+        started = time.perf_counter()
+        await projects.write_many([Insert(document) for document in documents])
+        seed_seconds = time.perf_counter() - started
+        ids = [document["id"] for document in documents]
+
+        print(f"🗄️  {engine}: {args.documents} documents written in {seed_seconds * 1000:.0f} ms")
+        print(f"{'scenario':30} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ops/s':>9}")
+        counter = iter(range(10 ** 9))
+        for name, operation, whole_collection in scenarios(projects, ids, counter):
+            operations = max(args.operations // 10, 1) if whole_collection else args.operations
+            stats = summarize(*await run(operation, args.concurrency, operations))
+            rows.append({"scenario": name, "operations": operations, **{
+                key: round(value, 4) for key, value in stats.items()
+            }})
+            print(f"{name:30} {stats['mean']:8.3f} {stats['p50']:8.3f} {stats['p95']:8.3f} "
+                  f"{stats['p99']:8.3f} {stats['throughput']:9.0f}")
+        print()
+    finally:
+        if cleanup is not None:
+            await cleanup()
+        storage.close()
+    return {"engine": engine, "seedMs": round(seed_seconds * 1000, 1), "results": rows}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare the storage engines on the API's queries")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated subset of memory,sqlite,mongo")
+    parser.add_argument("--documents", type=int, default=1000, help="projects in the collection")
+    parser.add_argument("--operations", type=int, default=2000, help="calls per scenario (a tenth for whole-collection reads)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/storage-<timestamp>.json)")
+    args = parser.parse_args()
+
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(sorted(unknown))}")
+
+    print(f"⏱️  {args.documents} documents, concurrency {args.concurrency}\n")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for engine in engines:
+            result = await bench_engine(engine, args, directory)
+            if result is not None:
+                results.append(result)
+    print("(latencies in ms)")
+
+    output = args.output or RESULTS_DIR / f"storage-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "startedAt": datetime.utcnow().isoformat(),
+        "settings": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+        "engines": results,
+    }, indent=2))
+    print(f"📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Write-path latency benchmark: the old multi-round-trip handlers against the
+single-round-trip ones, under concurrent load.
+
+    cd backend && python -m benchmarks.write_latency --concurrency 32 --operations 2000
+
+Runs against MONGO_URL/DB_NAME using a scratch collection that is dropped afterwards.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+from database import connect
+from models import Project, ProjectCreate
+
+SCRATCH_COLLECTION = "bench_write_latency"
+
+PAYLOAD = ProjectCreate(
+    title="Benchmark Project",
+    description="Synthetic project used by the write latency benchmark.",
+    technologies=["Python", "FastAPI", "MongoDB"],
+    category="Backend Development",
+    highlights=["One", "Two", "Three"],
+    status="Completed",
+    type="Personal Project",
+)
+
+
+# Handler bodies as they were: insert + read back, find + update + read back
+async def legacy_create(collection):
+    project = Project(**PAYLOAD.dict())
+    result = await collection.insert_one(project.dict())
+    return await collection.find_one({"_id": result.inserted_id})
+
+
+async def legacy_update(collection, project_id):
+    existing = await collection.find_one({"id": project_id})
+    if not existing:
+        return None
+    await collection.update_one({"id": project_id}, {"$set": {"title": "Updated", "updatedAt": datetime.utcnow()}})
+    return await collection.find_one({"id": project_id})
+
+
+# Current handler bodies: one round trip each
+async def single_trip_create(collection):
+    project = Project(**PAYLOAD.dict())
+    await collection.insert_one(project.dict())
+    return project
+
+
+async def single_trip_update(collection, project_id):
+    return await collection.find_one_and_update(
+        {"id": project_id},
+        {"$set": {"title": "Updated", "updatedAt": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def run(operation, concurrency, operations):
+    """Run `operations` calls with `concurrency` workers; returns per-call latencies in ms"""
+    latencies = []
+    remaining = iter(range(operations))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await operation()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+def summarize(latencies, elapsed):
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "throughput": len(ordered) / elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare write-path latency before/after single-round-trip handlers")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = connect()
+    collection = db.database[SCRATCH_COLLECTION]
+    try:
+        await collection.drop()
+        await collection.create_index("id", unique=True)
+        seed = [Project(**PAYLOAD.dict()).dict() for _ in range(args.concurrency)]
+        await collection.insert_many(seed)
+        ids = [doc["id"] for doc in seed]
+
+        def updater(update):
+            counter = iter(range(args.operations))
+            return lambda: update(collection, ids[next(counter) % len(ids)])
+
+        scenarios = [
+            ("create (insert + find_one)", lambda: legacy_create(collection)),
+            ("create (insert only)", lambda: single_trip_create(collection)),
+            ("update (find + update + find)", updater(legacy_update)),
+            ("update (find_one_and_update)", updater(single_trip_update)),
+        ]
+
+        print(f"⏱️  {args.operations} operations per scenario, concurrency {args.concurrency}\n")
+        print(f"{'scenario':32} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ops/s':>9}")
+        for name, operation in scenarios:
+            stats = summarize(*await run(operation, args.concurrency, args.operations))
+            print(
+                f"{name:32} {stats['mean']:8.2f} {stats['p50']:8.2f} {stats['p95']:8.2f} "
+                f"{stats['p99']:8.2f} {stats['throughput']:9.0f}"
+            )
+        print("\n(latencies in ms)")
+    finally:
+        await collection.drop()
+        db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Bulk create / upsert for the collection endpoints.
+
+A batch is validated item by item and written with one unordered
+`write_many` (a single `bulk_write` on MongoDB): items without an `id`
+are inserted, items with an `id` are upserted on it. Invalid items and
+failed writes are reported per index without failing the rest of the
+batch.
+"""
+from datetime import datetime
+
+from pydantic import ValidationError
+
+from storage import Insert, Upsert
+
+MAX_BULK_ITEMS = 1000
+
+
+def describe_validation_error(error):
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def build_operation(create_model, model, item):
+    """Validate one raw item; returns (id, operation)"""
+    if not isinstance(item, dict):
+        raise ValueError("item: must be an object")
+    item_id = item.get("id")
+    if item_id is not None and not isinstance(item_id, str):
+        raise ValueError("id: must be a string")
+    payload = create_model(**{k: v for k, v in item.items() if k != "id"})
+
+    if item_id is None:
+        document = model(**payload.dict()).dict()
+        return document["id"], Insert(document)
+
+    now = datetime.utcnow()
+    return item_id, Upsert(
+        {"id": item_id},
+        {**payload.dict(), "updatedAt": now},
+        {"id": item_id, "createdAt": now},
+    )
+
+
+async def bulk_upsert(repository, create_model, model, items):
+    """Write a batch of raw items; returns a BulkWriteSummary-shaped dict"""
+    results = []
+    operations = []
+    positions = []  # operation index -> result index
+    for index, item in enumerate(items):
+        try:
+            item_id, operation = build_operation(create_model, model, item)
+        except ValidationError as e:
+            results.append({"index": index, "id": None, "status": "error", "error": describe_validation_error(e)})
+            continue
+        except ValueError as e:
+            results.append({"index": index, "id": None, "status": "error", "error": str(e)})
+            continue
+        status = "inserted" if isinstance(operation, Insert) else "updated"
+        results.append({"index": index, "id": item_id, "status": status, "error": None})
+        positions.append(len(results) - 1)
+        operations.append(operation)
+
+    counts = {"inserted": 0, "upserted": 0, "matched": 0, "modified": 0}
+    if operations:
+        written = await repository.write_many(operations)
+        for index, message in written["errors"].items():
+            entry = results[positions[index]]
+            entry["status"] = "error"
+            entry["error"] = message
+        for index in written["created"]:
+            results[positions[index]]["status"] = "created"
+        counts = {key: written[key] for key in counts}
+
+    return {
+        **counts,
+        "failed": sum(1 for entry in results if entry["status"] == "error"),
+        "results": results,
+    }
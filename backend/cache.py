@@ -0,0 +1,277 @@
+"""
+In-process response cache for the read endpoints.
+
+Each collection gets its own TTL/LRU bucket holding already serialized JSON
+bodies, so repeated reads skip both MongoDB and response validation. Write
+handlers invalidate the bucket of the collection they touch.
+
+Concurrent misses for the same entry are coalesced (single-flight): the
+first request runs the read and the others await its result, so a burst of
+identical requests after a write or an expiry costs one MongoDB query.
+
+Expired entries are kept for up to CACHE_MAX_STALE_SECONDS more and served
+stale while a single background task refreshes them, so only a request
+arriving after that window (or after a write, which drops the bucket) waits
+for MongoDB. 0 turns stale serving off.
+
+Cached bodies carry their HTTP validators (ETag / Last-Modified), computed
+once when the entry is filled, so conditional requests are answered without
+touching the database or re-serializing anything. Compressed variants are
+added lazily and live exactly as long as the body they were made from.
+"""
+import asyncio
+import os
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MAX_STALE_SECONDS = float(os.environ.get("CACHE_MAX_STALE_SECONDS", "60"))
+
+
+class CachedBody:
+    """Serialized JSON body plus the validators and compressed variants derived from it"""
+
+    __slots__ = ("body", "etag", "last_modified", "compressed")
+
+    def __init__(self, body, last_modified=None, etag=None):
+        self.body = body
+        self.etag = etag or '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.last_modified = last_modified
+        self.compressed = {}
+
+    def encoded(self, encoding, compress):
+        """The body in `encoding`, compressed with `compress` on first use only"""
+        body = self.compressed.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding, cached=True)
+            self.compressed[encoding] = body
+        return body
+
+    def encoded_etag(self, encoding):
+        """Each representation needs its own strong validator"""
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after `ttl` seconds
+
+    An expired entry can still be read with `lookup` for `max_stale` more
+    seconds, flagged as stale; `get` only ever returns fresh values.
+    """
+
+    def __init__(self, ttl, max_entries, max_stale=0, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._clock = clock
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, key):
+        """(value, fresh), or (None, False) on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+
+        expires_at, value = entry
+        now = self._clock()
+        if expires_at <= now:
+            if now < expires_at + self.max_stale:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return value, False
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None, False
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value, True
+
+    def get(self, key):
+        value, fresh = self.lookup(key)
+        return value if fresh else None
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hitRatio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """One TTLCache per collection, invalidated as a whole on writes"""
+
+    def __init__(self, ttl, max_entries, max_stale=0, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._clock = clock
+        self._buckets = {}
+        self._modified = {}
+        self._generations = {}
+        self.invalidations = 0
+
+    def bucket(self, collection_name):
+        bucket = self._buckets.get(collection_name)
+        if bucket is None:
+            bucket = TTLCache(self.ttl, self.max_entries, self.max_stale, clock=self._clock)
+            self._buckets[collection_name] = bucket
+        return bucket
+
+    def get(self, collection_name, key):
+        return self.bucket(collection_name).get(key)
+
+    def lookup(self, collection_name, key):
+        """(value, fresh), where a stale value is expired but still within max_stale"""
+        return self.bucket(collection_name).lookup(key)
+
+    def set(self, collection_name, key, value):
+        self.bucket(collection_name).set(key, value)
+
+    def invalidate(self, collection_name):
+        self.bucket(collection_name).clear()
+        self._modified[collection_name] = datetime.utcnow()
+        self._generations[collection_name] = self.generation(collection_name) + 1
+        self.invalidations += 1
+
+    def generation(self, collection_name):
+        """Bumped by every invalidation; a read started under an older generation may predate a write"""
+        return self._generations.get(collection_name, 0)
+
+    def last_write(self, collection_name):
+        """When this process last invalidated `collection_name`, if ever"""
+        return self._modified.get(collection_name)
+
+    def clear(self):
+        for bucket in self._buckets.values():
+            bucket.clear()
+
+    def stats(self):
+        collections = {name: bucket.stats() for name, bucket in self._buckets.items()}
+        totals = {
+            field: sum(stats[field] for stats in collections.values())
+            for field in ("entries", "hits", "staleHits", "misses", "evictions", "expirations")
+        }
+        served = totals["hits"] + totals["staleHits"]
+        lookups = served + totals["misses"]
+        totals["hitRatio"] = round(served / lookups, 4) if lookups else 0.0
+        totals["invalidations"] = self.invalidations
+        return {
+            "ttlSeconds": self.ttl,
+            "maxStaleSeconds": self.max_stale,
+            "maxEntriesPerCollection": self.max_entries,
+            "totals": totals,
+            "collections": collections,
+        }
+
+
+class SingleFlight:
+    """Concurrent calls for the same key share one execution
+
+    The first caller starts `load()` as a task and later callers await that
+    same task until it finishes. The task is shielded, so a caller that goes
+    away (e.g. a client disconnect) does not cancel it for the others.
+    `refresh` starts the same task without waiting for it.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._counts = {}
+
+    def _count(self, group, outcome):
+        counts = self._counts.get(group)
+        if counts is None:
+            counts = self._counts[group] = {"leaders": 0, "coalesced": 0, "refreshes": 0}
+        counts[outcome] += 1
+
+    def _launch(self, group, key, load):
+        """The task in flight for (group, key), and whether this call started it"""
+        flight_key = (group, key)
+        task = self._flights.get(flight_key)
+        if task is not None:
+            return task, False
+        task = asyncio.ensure_future(load())
+        self._flights[flight_key] = task
+
+        def landed(finished):
+            if self._flights.get(flight_key) is finished:
+                del self._flights[flight_key]
+            if not finished.cancelled():
+                finished.exception()  # retrieved even when every caller has gone
+
+        task.add_done_callback(landed)
+        return task, True
+
+    async def run(self, group, key, load):
+        task, started = self._launch(group, key, load)
+        self._count(group, "leaders" if started else "coalesced")
+        return await asyncio.shield(task)
+
+    def refresh(self, group, key, load):
+        """Start `load()` in the background unless it is already in flight"""
+        task, started = self._launch(group, key, load)
+        if started:
+            self._count(group, "refreshes")
+            task.add_done_callback(self._report_refresh)
+
+    @staticmethod
+    def _report_refresh(task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background cache refresh failed: %r", task.exception())
+
+    def stats(self):
+        in_flight = {}
+        for group, _ in self._flights:
+            in_flight[group] = in_flight.get(group, 0) + 1
+        groups = {
+            group: {**counts, "inFlight": in_flight.get(group, 0)} for group, counts in self._counts.items()
+        }
+        return {
+            "totals": {
+                field: sum(counts[field] for counts in groups.values())
+                for field in ("leaders", "coalesced", "refreshes", "inFlight")
+            },
+            "collections": groups,
+        }
+
+
+response_cache = ResponseCache(
+    ttl=float(os.environ.get("CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", "128")),
+    max_stale=MAX_STALE_SECONDS,
+)
+
+# Cache misses in flight, coalesced per (collection, key)
+cache_fills = SingleFlight()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Cross-instance cache invalidation driven by MongoDB change streams.
+
+Every API instance tails one change stream over the portfolio collections
+and applies each change to its own in-process state: the collection's
+response cache bucket is invalidated and the search index is updated, so a
+write handled by any replica reaches the caches of all of them.
+
+The stream's resume token is saved (every CHANGE_STREAM_FLUSH_SECONDS at
+most) in the `change_stream_tokens` collection under this process's
+consumer name, and a restarted watcher resumes from it. Unless
+CHANGE_STREAM_CONSUMER names it, the consumer is `<hostname>-<n>`, where
+each process claims the lowest slot `n` not leased by another live process
+on the host; the lease is renewed with every checkpoint and released on
+shutdown. That way uvicorn workers on one host each keep their own token,
+and a restarted worker picks up a slot (and token) a stopped one left. If
+the token can no longer be resumed (the oplog has rolled past it), every
+cache is invalidated and the search index rebuilt before tailing from
+"now", since changes were lost.
+
+Change streams need a replica set; a single-node one is enough:
+
+    docker run -d --name mongo-rs -p 27017:27017 mongo:7.0 --replSet rs0
+    docker exec mongo-rs mongosh --quiet --eval 'rs.initiate()'
+    export MONGO_URL='mongodb://localhost:27017/?replicaSet=rs0&directConnection=true'
+    python changes.py            # print every change as this instance applies it
+
+On a standalone server the watcher logs a warning and stays off.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+from cache import response_cache
+from database import COLLECTION_NAMES
+from search import search_index
+
+logger = logging.getLogger(__name__)
+
+CHANGE_STREAMS = os.environ.get("CHANGE_STREAMS", "auto").lower()  # "auto" or "off"
+CONSUMER = os.environ.get("CHANGE_STREAM_CONSUMER") or None  # None: claim a `<hostname>-<n>` slot
+FLUSH_SECONDS = float(os.environ.get("CHANGE_STREAM_FLUSH_SECONDS", "5"))
+TOKENS_COLLECTION = "change_stream_tokens"
+MAX_SLOTS = 256
+MAX_BACKOFF_SECONDS = 30
+
+# Server error codes
+CHANGE_STREAM_HISTORY_LOST = 286
+INVALID_RESUME_TOKEN = 260
+NOT_A_REPLICA_SET = 40573
+
+
+def change_streams_enabled(setting=CHANGE_STREAMS):
+    return setting not in ("0", "off", "false", "no")
+
+
+class ChangeWatcher:
+    """Background task applying change events to this process's caches"""
+
+    def __init__(self, db, cache=response_cache, index=search_index, consumer=CONSUMER,
+                 flush_seconds=FLUSH_SECONDS, on_change=None, host=None):
+        self.db = db
+        self.cache = cache
+        self.index = index
+        self.consumer = consumer
+        self.leased = consumer is None
+        self.host = host or socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}:{id(self):x}"
+        self.flush_seconds = flush_seconds
+        self.lease_seconds = max(30.0, 3 * flush_seconds)
+        self.on_change = on_change
+        self.token = None
+        self._saved_token = None
+        self._token_loaded = False
+        self._task = None
+        self.applied = 0
+        self.resyncs = 0
+
+    @property
+    def tokens(self):
+        return self.db.database[TOKENS_COLLECTION]
+
+    async def claim(self):
+        """Lease the lowest free `<host>-<n>` slot; returns its saved document"""
+        for slot in range(MAX_SLOTS):
+            name = f"{self.host}-{slot}"
+            now = datetime.utcnow()
+            try:
+                document = await self.tokens.find_one_and_update(
+                    {"_id": name, "$or": [
+                        {"owner": None}, {"owner": self.owner}, {"leaseUntil": {"$lt": now}},
+                    ]},
+                    {"$set": {"owner": self.owner, "leaseUntil": now + timedelta(seconds=self.lease_seconds)}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                continue  # leased by a live process
+            self.consumer = name
+            return document
+        raise RuntimeError(f"All {MAX_SLOTS} change stream consumer slots on {self.host} are leased")
+
+    async def load_token(self):
+        if self.leased:
+            document = await self.claim()
+        else:
+            document = await self.tokens.find_one({"_id": self.consumer})
+        self._saved_token = document.get("token") if document else None
+        return self._saved_token
+
+    async def save_token(self, release=False):
+        """Checkpoint the resume token, renewing (or with `release`, ending) this process's lease"""
+        if not self.leased:
+            if self.token != self._saved_token:
+                await self.tokens.update_one(
+                    {"_id": self.consumer},
+                    {"$set": {"token": self.token, "updatedAt": datetime.utcnow()}},
+                    upsert=True,
+                )
+                self._saved_token = self.token
+            return
+        if self.consumer is None:
+            return  # never claimed a slot
+        now = datetime.utcnow()
+        lease = {"owner": None} if release else {"leaseUntil": now + timedelta(seconds=self.lease_seconds)}
+        result = await self.tokens.update_one(
+            {"_id": self.consumer, "owner": self.owner},
+            {"$set": {"token": self.token, "updatedAt": now, **lease}},
+        )
+        if not result.matched_count and not release:
+            # The lease lapsed (e.g. a long outage) and another process took the slot
+            logger.warning("Lost the change stream slot %s; claiming another", self.consumer)
+            await self.claim()
+            await self.save_token()
+            return
+        self._saved_token = self.token
+
+    async def resync(self):
+        """Drop everything derived from the database; used when changes may have been missed"""
+        for collection_name in COLLECTION_NAMES:
+            self.cache.invalidate(collection_name)
+        await self.index.build(self.db)
+        self.resyncs += 1
+
+    async def apply(self, change):
+        operation = change["operationType"]
+        collection_name = change.get("ns", {}).get("coll")
+        if collection_name not in COLLECTION_NAMES:
+            await self.resync()  # dropDatabase and the like
+            return
+        self.cache.invalidate(collection_name)
+        document = change.get("fullDocument")
+        if operation in ("insert", "update", "replace") and document is not None:
+            self.index.index(collection_name, document)
+        else:
+            # Deletes only carry the Mongo _id, and drops carry nothing
+            await self.index.reload(self.db, collection_name)
+
+    async def supported(self):
+        hello = await self.db.client.admin.command("hello")
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    async def tail(self):
+        """Apply changes until the stream ends; raises on server errors"""
+        async with self.db.database.watch(
+            [{"$match": {"ns.coll": {"$in": list(COLLECTION_NAMES)}}}],
+            full_document="updateLookup",
+            resume_after=self.token,
+            max_await_time_ms=1000,
+        ) as stream:
+            last_flush = time.monotonic()
+            while stream.alive:
+                change = await stream.try_next()
+                if change is not None:
+                    if change["operationType"] == "invalidate":
+                        # The stream cannot be resumed past an invalidate
+                        self.token = None
+                        await self.resync()
+                        return
+                    await self.apply(change)
+                    self.applied += 1
+                    if self.on_change is not None:
+                        self.on_change(change)
+                self.token = stream.resume_token
+                if time.monotonic() - last_flush >= self.flush_seconds:
+                    await self.save_token()
+                    last_flush = time.monotonic()
+
+    async def run(self):
+        backoff = 1
+        lost_history = False
+        while True:
+            try:
+                if lost_history:
+                    await self.resync()
+                    lost_history = False
+                if not await self.supported():
+                    logger.warning("MongoDB is not a replica set; change-stream invalidation is disabled")
+                    return
+                if not self._token_loaded:
+                    self.token = await self.load_token()
+                    self._token_loaded = True
+                    logger.info("Tailing changes as consumer %s", self.consumer)
+                await self.tail()
+                backoff = 1
+            except OperationFailure as e:
+                if e.code == NOT_A_REPLICA_SET:
+                    logger.warning("MongoDB does not support change streams; change-stream invalidation is disabled")
+                    return
+                if e.code in (CHANGE_STREAM_HISTORY_LOST, INVALID_RESUME_TOKEN):
+                    logger.warning("Resume token for %s is no longer valid; resynchronizing", self.consumer)
+                    self.token = None
+                    lost_history = True
+                    continue
+                logger.error("Change stream failed: %s", e)
+            except PyMongoError as e:
+                logger.warning("Change stream interrupted: %s", e)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change stream watcher stopped")
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.save_token(release=True)
+        except PyMongoError as e:
+            logger.warning("Could not save the change stream resume token: %s", e)
+
+    def stats(self):
+        return {
+            "consumer": self.consumer,
+            "running": self._task is not None and not self._task.done(),
+            "applied": self.applied,
+            "resyncs": self.resyncs,
+        }
+
+
+async def main():
+    from database import connect
+
+    db = connect()
+    await search_index.build(db)
+
+    def report(change):
+        key = change.get("documentKey", {}).get("_id")
+        print(f"🔄 {change['operationType']:8} {change['ns']['coll']:14} {key}  "
+              f"(searchable: {search_index.stats()['documents']})")
+
+    watcher = ChangeWatcher(db, on_change=report)
+    print("👀 Tailing changes; Ctrl+C to stop")
+    try:
+        await watcher.start()
+    finally:
+        await watcher.stop()
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
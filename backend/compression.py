@@ -0,0 +1,157 @@
+"""
+Response compression: gzip / brotli negotiated from Accept-Encoding.
+
+Cached GET bodies are compressed once per content change and the result is
+kept on the CachedBody next to the identity bytes. Everything else goes
+through CompressionMiddleware, which compresses on the fly (streaming
+responses chunk by chunk) and leaves responses that already carry a
+Content-Encoding untouched.
+"""
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "5"))
+# Cached bodies are compressed once per content change, so they can afford more effort
+CACHED_GZIP_LEVEL = 9
+CACHED_BROTLI_QUALITY = 9
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding):
+    """Best supported encoding the client accepts (brotli preferred on ties), or None"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name] = quality
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body, encoding, cached=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=CACHED_BROTLI_QUALITY if cached else BROTLI_QUALITY)
+    compressor = zlib.compressobj(CACHED_GZIP_LEVEL if cached else GZIP_LEVEL, wbits=31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, wbits=31)
+
+    def compress(self, data):
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+
+
+def is_compressible(content_type):
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing uncompressed responses over MIN_SIZE"""
+
+    def __init__(self, app, minimum_size=MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = {name.lower(): value for name, value in start["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                body = message.get("body", b"")
+                streaming = message.get("more_body", False)
+                if (
+                    b"content-encoding" in headers
+                    or not is_compressible(content_type)
+                    or (not streaming and len(body) < self.minimum_size)
+                ):
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = StreamCompressor(encoding)
+                raw_headers = [
+                    (name, value) for name, value in start["headers"]
+                    if name.lower() not in (b"content-length", b"etag")
+                ]
+                raw_headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                if streaming:
+                    await send({**start, "headers": raw_headers})
+                    await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+                else:
+                    compressed = compress(body, encoding)
+                    raw_headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start, "headers": raw_headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                return
+
+            if compressor is None:
+                await send(message)
+                return
+            more_body = message.get("more_body", False)
+            data = compressor.compress(message.get("body", b""))
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
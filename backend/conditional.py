@@ -0,0 +1,92 @@
+"""
+Conditional GET support: ETag / Last-Modified validators and 304 responses.
+"""
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from cache import MAX_STALE_SECONDS
+
+# Revalidate on every use, but let shared caches serve a stale copy while they
+# do, for as long as this server would serve one from its own cache
+if MAX_STALE_SECONDS > 0:
+    CACHE_CONTROL = f"max-age=0, stale-while-revalidate={int(MAX_STALE_SECONDS)}"
+else:
+    CACHE_CONTROL = "no-cache"
+
+
+def format_http_date(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value):
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison, as RFC 9110 prescribes for If-None-Match"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(headers, etag, last_modified):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the validators"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    since = parse_http_date(if_modified_since)
+    if since is None:
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag, last_modified):
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
+
+
+def _updated_at(item):
+    return item.get("updatedAt") if isinstance(item, dict) else getattr(item, "updatedAt", None)
+
+
+def latest_update(value):
+    """Most recent `updatedAt` among model instance(s) or trusted document(s), or None"""
+    if value is None:
+        return None
+    if isinstance(value, dict) and isinstance(value.get("items"), list):
+        value = value["items"]
+    elif isinstance(getattr(value, "items", None), list):
+        value = value.items
+    if isinstance(value, list):
+        return max((ts for ts in map(_updated_at, value) if ts is not None), default=None)
+    return _updated_at(value)
+
+
+def newest(*timestamps):
+    timestamps = [ts for ts in timestamps if ts is not None]
+    return max(timestamps) if timestamps else None
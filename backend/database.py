@@ -1,23 +1,89 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import Request
 import os
+import logging
 from dotenv import load_dotenv
 
+from storage import MotorRepository, MemoryStorage, SQLiteStorage, Storage
+
 load_dotenv()
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-database_name = os.environ.get('DB_NAME', 'portfolio_db')
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAMES = (
+    "personal_info",
+    "experience",
+    "projects",
+    "skills",
+    "education",
+    "achievements",
+)
+
+# Connection pool settings: environment variable -> (MongoClient option, parser)
+POOL_SETTINGS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_COMPRESSORS": ("compressors", str),  # e.g. "zstd,snappy,zlib"
+}
+
+
+def pool_options_from_env(environ=os.environ):
+    """Client options for every pool setting present in the environment; the rest keep driver defaults"""
+    options = {}
+    for variable, (option, parse) in POOL_SETTINGS.items():
+        value = environ.get(variable)
+        if value not in (None, ""):
+            options[option] = parse(value)
+    return options
+
+
+STORAGE_ENGINE = os.environ.get("STORAGE_ENGINE", "mongo").lower()  # "mongo", "memory" or "sqlite"
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "portfolio.sqlite3")
+
+
+class PortfolioDatabase(Storage):
+    """A Motor client and repositories over the portfolio collections on it"""
+
+    engine = "mongo"
+
+    def __init__(self, client, database_name):
+        self.client = client
+        self.database = client[database_name]
+        super().__init__({
+            name: MotorRepository(self.database.get_collection(name)) for name in COLLECTION_NAMES
+        })
+
+    async def warm_up(self):
+        """Fail fast on a bad URL and get the first pooled connection open before serving"""
+        await self.client.admin.command("ping")
+
+    def close(self):
+        self.client.close()
+
+
+def connect(mongo_url=None, database_name=None, **options):
+    """Create a client configured from MONGO_URL / DB_NAME and the MONGO_* pool settings"""
+    mongo_url = mongo_url or os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    database_name = database_name or os.environ.get('DB_NAME', 'portfolio_db')
+    client = AsyncIOMotorClient(mongo_url, **{**pool_options_from_env(), **options})
+    return PortfolioDatabase(client, database_name)
+
 
-client = AsyncIOMotorClient(mongo_url)
-database = client[database_name]
+def open_storage(engine=None, **options):
+    """The storage engine chosen by STORAGE_ENGINE; `options` are MongoDB client options"""
+    engine = (engine or STORAGE_ENGINE).lower()
+    if engine == "mongo":
+        return connect(**options)
+    if engine == "memory":
+        return MemoryStorage(COLLECTION_NAMES)
+    if engine == "sqlite":
+        return SQLiteStorage(SQLITE_PATH, COLLECTION_NAMES)
+    raise ValueError(f"Unknown STORAGE_ENGINE {engine!r}; expected mongo, memory or sqlite")
 
-# Collections
-personal_info_collection = database.get_collection("personal_info")
-experience_collection = database.get_collection("experience")
-projects_collection = database.get_collection("projects")
-skills_collection = database.get_collection("skills")
-education_collection = database.get_collection("education")
-achievements_collection = database.get_collection("achievements")
 
-async def close_database_connection():
-    client.close()
\ No newline at end of file
+async def get_database(request: Request):
+    """FastAPI dependency: the database owned by this application instance"""
+    return request.app.state.db
@@ -0,0 +1,40 @@
+"""
+Streaming NDJSON export of the portfolio collections.
+
+On MongoDB, documents are pulled from the Motor cursors batch by batch
+and written out as they arrive; StreamingResponse only asks for the next
+chunk once the previous one has been sent, so memory stays flat whatever
+the collection size. (The in-memory and SQLite engines hold a collection
+at once.) Each line is `{"collection": <name>, "document": {...}}`.
+"""
+import os
+import zlib
+
+from serialization import encode_document
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+CHUNK_SIZE = 64 * 1024
+
+
+async def ndjson_lines(db, collections, models):
+    for name in collections:
+        prefix = b'{"collection":"%s","document":' % name.encode()
+        documents = db.collection(name).stream({}, {"_id": 0}, batch_size=EXPORT_BATCH_SIZE)
+        async for document in documents:
+            yield prefix + encode_document(models[name], document) + b"}\n"
+
+
+async def ndjson_chunks(lines, gzip=False):
+    """Group lines into ~CHUNK_SIZE writes, gzip-compressing on the fly if asked"""
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    buffer = bytearray()
+    async for line in lines:
+        buffer += line
+        if len(buffer) >= CHUNK_SIZE:
+            chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+            buffer.clear()
+            if chunk:
+                yield chunk
+    tail = compressor.compress(bytes(buffer)) + compressor.flush() if compressor else bytes(buffer)
+    if tail:
+        yield tail
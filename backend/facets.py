@@ -0,0 +1,89 @@
+"""
+Faceted filtering of projects.
+
+Filters are OR within a facet and AND across facets. Facet counts are
+disjunctive: each facet is counted with every *other* facet's filter
+applied, so a filter UI can still show the alternatives to a value that
+is already selected. On MongoDB all facets are counted in one `$facet`
+aggregation; other storage engines count the same way over a plain read.
+"""
+import json
+from collections import Counter
+
+from storage.documents import matches, sort_key
+
+# Filterable project fields; `technologies` is an array (multikey index)
+PROJECT_FACETS = ("category", "status", "type", "technologies", "isFeatured")
+MULTIKEY_FACETS = {"technologies"}
+
+
+def facet_query(filters, exclude=None):
+    """Mongo filter for `filters` ({field: [values]}), leaving out the `exclude` facet"""
+    query = {}
+    for field, values in filters.items():
+        if field == exclude or not values:
+            continue
+        query[field] = values[0] if len(values) == 1 else {"$in": list(values)}
+    return query
+
+
+def facet_pipeline(filters):
+    facets = {}
+    for field in PROJECT_FACETS:
+        stages = [{"$match": facet_query(filters, exclude=field)}]
+        if field in MULTIKEY_FACETS:
+            stages.append({"$unwind": f"${field}"})
+        stages += [
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+        facets[field] = stages
+    return [{"$facet": facets}]
+
+
+def facet_value(value):
+    """JSON object key for a facet value"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def count_facets(documents, filters):
+    """The `$facet` aggregation's buckets, computed in Python: most frequent value first, then by value"""
+    queries = {field: facet_query(filters, exclude=field) for field in PROJECT_FACETS}
+    counters = {field: Counter() for field in PROJECT_FACETS}
+    for document in documents:
+        for field, counter in counters.items():
+            if not matches(document, queries[field]):
+                continue
+            value = document.get(field)
+            values = value if field in MULTIKEY_FACETS and isinstance(value, list) else [value]
+            counter.update(value for value in values if value is not None)
+    return {
+        field: [
+            {"_id": value, "count": count}
+            for value, count in sorted(counter.items(), key=lambda bucket: (-bucket[1], sort_key(bucket[0])))
+        ]
+        for field, counter in counters.items()
+    }
+
+
+async def facet_counts(repository, filters):
+    """{facet: {value: count}} for every project facet"""
+    if repository.native is not None:
+        (result,) = await repository.native.aggregate(facet_pipeline(filters)).to_list(1)
+    else:
+        projection = {field: 1 for field in PROJECT_FACETS}
+        result = count_facets(await repository.find({}, projection), filters)
+    return {
+        field: {facet_value(bucket["_id"]): bucket["count"] for bucket in result[field] if bucket["_id"] is not None}
+        for field in PROJECT_FACETS
+    }
+
+
+def filters_key(filters):
+    """Stable cache key fragment for a set of filters"""
+    return json.dumps(
+        {field: sorted(map(facet_value, values)) for field, values in sorted(filters.items()) if values},
+        separators=(",", ":"),
+    )
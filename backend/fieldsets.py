@@ -0,0 +1,45 @@
+"""
+Sparse fieldsets: `?fields=title,technologies` turned into a MongoDB projection.
+
+Only the requested fields (plus `id`) are read from disk, validated and sent;
+the partial documents are validated against the `*Partial` models.
+"""
+from fastapi import HTTPException
+
+ALWAYS_INCLUDED = ("id",)
+
+
+def select_fields(model, fields):
+    """Parse and validate a `fields` query parameter; None means the full document"""
+    if fields is None:
+        return None
+    selected = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not selected:
+        return None
+    unknown = [name for name in selected if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields for {model.__name__}: {', '.join(unknown)}. "
+                   f"Valid fields: {', '.join(model.model_fields)}"
+        )
+    return tuple(sorted(set(selected) | set(ALWAYS_INCLUDED)))
+
+
+def projection(selected, extra=()):
+    if selected is None:
+        return None
+    spec = {name: 1 for name in selected + tuple(extra)}
+    spec["_id"] = 0
+    return spec
+
+
+def restrict(document, selected):
+    """Drop fields that were only projected for internal use, e.g. keyset sort keys"""
+    if selected is None:
+        return document
+    return {name: document[name] for name in selected if name in document}
+
+
+def fields_key(key, selected):
+    return key if selected is None else f"{key}:fields={','.join(selected)}"
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Declarative index registry for the portfolio collections.
+
+`ensure_indexes` is applied at application startup and is idempotent:
+MongoDB treats re-creating an identical index as a no-op. Run this module
+directly to apply the registry by hand, or with `--explain` to run
+`explain()` on every query shape the API issues and flag collection scans.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from pagination import CREATED_AT_KEYSET, SKILLS_KEYSET, ACHIEVEMENTS_KEYSET
+
+logger = logging.getLogger(__name__)
+
+
+def id_index():
+    return IndexModel([("id", ASCENDING)], unique=True, name="id_unique")
+
+
+def keyset_index(keyset, prefix=()):
+    """Index covering a keyset sort, optionally preceded by equality fields"""
+    keys = [(field, ASCENDING) for field in prefix] + list(keyset.sort)
+    return IndexModel(keys, name="_".join(f"{field}_{direction}" for field, direction in keys))
+
+
+# Newest-updatedAt lookups (snapshot --watch polls every collection for one)
+UPDATED_AT_SORT = [("updatedAt", DESCENDING)]
+
+
+def updated_at_index():
+    return IndexModel(UPDATED_AT_SORT, name="updatedAt_-1")
+
+
+INDEXES = {
+    "personal_info": [
+        id_index(),
+        updated_at_index(),
+    ],
+    "experience": [
+        id_index(),
+        updated_at_index(),
+        keyset_index(CREATED_AT_KEYSET),
+    ],
+    "projects": [
+        id_index(),
+        updated_at_index(),
+        keyset_index(CREATED_AT_KEYSET),
+        keyset_index(CREATED_AT_KEYSET, prefix=("isFeatured",)),
+        # Faceted filters (technologies is an array: multikey)
+        keyset_index(CREATED_AT_KEYSET, prefix=("category",)),
+        keyset_index(CREATED_AT_KEYSET, prefix=("status",)),
+        keyset_index(CREATED_AT_KEYSET, prefix=("type",)),
+        keyset_index(CREATED_AT_KEYSET, prefix=("technologies",)),
+    ],
+    "skills": [
+        id_index(),
+        updated_at_index(),
+        keyset_index(SKILLS_KEYSET),
+    ],
+    "education": [
+        id_index(),
+        updated_at_index(),
+        keyset_index(CREATED_AT_KEYSET),
+    ],
+    "achievements": [
+        id_index(),
+        updated_at_index(),
+        keyset_index(ACHIEVEMENTS_KEYSET),
+    ],
+}
+
+
+async def ensure_indexes(database):
+    """Create every registered index; a conflicting existing index is logged, not fatal"""
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        try:
+            created[collection_name] = await database[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            logger.error("Could not create indexes on %s: %s", collection_name, e)
+    return created
+
+
+def _sample_cursor(keyset):
+    return keyset.encode({keyset.field: datetime.utcnow() if keyset.is_datetime else "", "id": ""})
+
+
+def query_shapes():
+    """(collection, description, filter, sort, single_document) for every read the API issues"""
+    shapes = [("personal_info", "get/update personal info", {}, None, True)]
+    for collection_name, keyset in (
+        ("experience", CREATED_AT_KEYSET),
+        ("projects", CREATED_AT_KEYSET),
+        ("skills", SKILLS_KEYSET),
+        ("education", CREATED_AT_KEYSET),
+        ("achievements", ACHIEVEMENTS_KEYSET),
+    ):
+        shapes += [
+            (collection_name, "list", {}, keyset.sort, False),
+            (collection_name, "list page", keyset.after(_sample_cursor(keyset)), keyset.sort, False),
+            (collection_name, "find by id", {"id": "x"}, None, False),
+            (collection_name, "newest update", {}, UPDATED_AT_SORT, False),
+        ]
+    featured = {"isFeatured": True}
+    shapes += [
+        ("projects", "featured", featured, CREATED_AT_KEYSET.sort, False),
+        ("projects", "featured page",
+         {"$and": [featured, CREATED_AT_KEYSET.after(_sample_cursor(CREATED_AT_KEYSET))]},
+         CREATED_AT_KEYSET.sort, False),
+    ]
+    for field in ("category", "status", "type", "technologies"):
+        shapes.append(("projects", f"filter {field}", {field: {"$in": ["x", "y"]}}, CREATED_AT_KEYSET.sort, False))
+    return shapes
+
+
+def plan_stages(plan):
+    stages = [plan.get("stage")]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages += plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+async def explain_queries(database):
+    """Explain every query shape; returns a list of report rows"""
+    report = []
+    for collection_name, description, query, sort, single_document in query_shapes():
+        cursor = database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = await cursor.explain()
+        stages = plan_stages(plan["queryPlanner"]["winningPlan"])
+        report.append({
+            "collection": collection_name,
+            "query": description,
+            "stages": stages,
+            # find_one() on the single-document personal_info collection is expected to scan
+            "collscan": "COLLSCAN" in stages and not single_document,
+        })
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--explain", action="store_true", help="report the plan of every API query")
+    args = parser.parse_args()
+
+    from database import connect
+
+    db = connect()
+    try:
+        await ensure_indexes(db.database)
+        print("✅ Indexes applied")
+        if args.explain:
+            report = await explain_queries(db.database)
+            for row in report:
+                flag = "❌ COLLSCAN" if row["collscan"] else "✅"
+                print(f"{flag:12} {row['collection']:14} {row['query']:16} {' <- '.join(row['stages'])}")
+            if any(row["collscan"] for row in report):
+                raise SystemExit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,347 @@
+"""
+Prometheus metrics, rendered in the text exposition format at /metrics.
+
+Instrumentation is kept cheap enough to leave on in production: recording
+an observation is a dict lookup, a bisect and two additions under an
+uncontended lock (pymongo's monitoring callbacks arrive from Motor's
+worker threads). Values that already live elsewhere, such as the response
+cache counters, are not duplicated; collectors read them at scrape time.
+
+    METRICS=off     disables the HTTP middleware and the MongoDB listeners
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from pymongo import monitoring
+
+from admission import admission_control
+from cache import response_cache, cache_fills
+from search import search_index
+
+METRICS = os.environ.get("METRICS", "on").lower() not in ("0", "off", "false", "no")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][position] += 1
+            state[1] += value
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def render(self):
+        lines = self.header()
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = format_labels(self.labelnames, labels, [("le", format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def add_collector(self, collect):
+        """`collect()` returns metrics built at scrape time from state kept elsewhere"""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collect in self._collectors:
+            for metric in collect():
+                lines += metric.render()
+        return ("\n".join(lines) + "\n").encode()
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ("method", "route", "status"),
+)
+# Routing has not run when a request starts, so in-flight requests are only split by method
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",),
+)
+mongodb_command_duration = registry.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time", ("command", "outcome"),
+)
+mongodb_pool_checkout_wait = registry.histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection",
+    buckets=WAIT_BUCKETS,
+)
+mongodb_pool_checkout_failures = registry.counter(
+    "mongodb_pool_checkout_failures_total", "Failed MongoDB connection checkouts", ("reason",),
+)
+mongodb_pool_connections = registry.gauge(
+    "mongodb_pool_connections", "Open MongoDB connections by state", ("address", "state"),
+)
+
+
+def route_template(scope):
+    """The matched route's path template, so label cardinality stays bounded"""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        method = scope["method"]
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec(method)
+            http_request_duration.observe(time.perf_counter() - start, method, route_template(scope), str(status))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongodb_command_duration.observe(event.duration_micros / 1e6, event.command_name, "succeeded")
+
+    def failed(self, event):
+        mongodb_command_duration.observe(event.duration_micros / 1e6, event.command_name, "failed")
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Checkout wait times and connection counts; checkout runs on one thread, so start times are thread-local"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            mongodb_pool_checkout_wait.observe(time.perf_counter() - started)
+            self._local.started = None
+        mongodb_pool_connections.inc(f"{event.address[0]}:{event.address[1]}", "in_use")
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        mongodb_pool_checkout_failures.inc(event.reason)
+
+    def connection_checked_in(self, event):
+        mongodb_pool_connections.dec(f"{event.address[0]}:{event.address[1]}", "in_use")
+
+    def connection_created(self, event):
+        mongodb_pool_connections.inc(f"{event.address[0]}:{event.address[1]}", "open")
+
+    def connection_closed(self, event):
+        mongodb_pool_connections.dec(f"{event.address[0]}:{event.address[1]}", "open")
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+def mongo_listeners():
+    """Event listeners to pass to the MongoDB client"""
+    return [CommandMetrics(), PoolMetrics()] if METRICS else []
+
+
+def response_cache_metrics():
+    stats = response_cache.stats()
+    collections = stats["collections"]
+    counters = {
+        field: Counter(f"response_cache_{field}_total", f"Response cache {field} by collection", ("collection",))
+        for field in ("hits", "misses", "evictions", "expirations")
+    }
+    counters["staleHits"] = Counter(
+        "response_cache_stale_hits_total", "Expired responses served while being refreshed, by collection",
+        ("collection",),
+    )
+    entries = Gauge("response_cache_entries", "Cached responses by collection", ("collection",))
+    hit_ratio = Gauge("response_cache_hit_ratio", "Response cache hits / lookups by collection", ("collection",))
+    for name, bucket in collections.items():
+        for field, counter in counters.items():
+            counter.set(bucket[field], name)
+        entries.set(bucket["entries"], name)
+        hit_ratio.set(bucket["hitRatio"], name)
+    invalidations = Counter("response_cache_invalidations_total", "Response cache bucket invalidations")
+    invalidations.set(stats["totals"]["invalidations"])
+    return [*counters.values(), entries, hit_ratio, invalidations]
+
+
+def single_flight_metrics():
+    stats = cache_fills.stats()["collections"]
+    fills = Counter(
+        "response_cache_fills_total",
+        "Response cache fills by collection: `leader` ran the read for a miss, `coalesced` awaited an identical one "
+        "in flight, `refresh` re-read a stale entry in the background",
+        ("collection", "outcome"),
+    )
+    in_flight = Gauge("response_cache_fills_in_flight", "Response cache fills currently running", ("collection",))
+    for name, counts in stats.items():
+        fills.set(counts["leaders"], name, "leader")
+        fills.set(counts["coalesced"], name, "coalesced")
+        fills.set(counts["refreshes"], name, "refresh")
+        in_flight.set(counts["inFlight"], name)
+    return [fills, in_flight]
+
+
+def search_index_metrics():
+    stats = search_index.stats()
+    documents = Gauge("search_index_documents", "Documents in the in-memory search index")
+    documents.set(stats["documents"])
+    terms = Gauge("search_index_terms", "Distinct terms in the in-memory search index")
+    terms.set(stats["terms"])
+    return [documents, terms]
+
+
+def admission_metrics():
+    stats = admission_control.stats()
+    decisions = Counter(
+        "admission_decisions_total",
+        "Requests by admission decision: admitted, queued (admitted after waiting), rate_limited (429), "
+        "queue_full or queue_timeout (503)",
+        ("decision",),
+    )
+    for decision, count in stats["decisions"].items():
+        decisions.set(count, decision)
+    queue_wait = Counter("admission_queue_wait_seconds_total", "Time requests spent waiting for a concurrency slot")
+    queue_wait.set(stats["queueWaitSeconds"])
+    active = Gauge("admission_active_requests", "Requests holding a concurrency slot")
+    active.set(stats["active"])
+    queued = Gauge("admission_queued_requests", "Requests waiting for a concurrency slot")
+    queued.set(stats["queued"])
+    clients = Gauge("admission_rate_limit_clients", "Clients with a rate limiting token bucket")
+    clients.set(stats["clients"])
+    return [decisions, queue_wait, active, queued, clients]
+
+
+registry.add_collector(response_cache_metrics)
+registry.add_collector(single_flight_metrics)
+registry.add_collector(search_index_metrics)
+registry.add_collector(admission_metrics)
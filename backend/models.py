@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, create_model
+from typing import Dict, Generic, List, Optional, TypeVar
 from datetime import datetime
 import uuid
 
@@ -116,6 +116,20 @@ class SkillUpdate(BaseModel):
     level: Optional[int] = Field(None, ge=0, le=100)
     description: Optional[str] = None
 
+class GroupedSkill(BaseModel):  # a Skill without the category its group carries
+    name: str
+    level: int
+    description: str
+    id: str
+    createdAt: datetime
+    updatedAt: datetime
+
+class SkillGroup(BaseModel):
+    category: str
+    count: int
+    averageLevel: float
+    skills: List[GroupedSkill]
+
 # Education Models
 class EducationBase(BaseModel):
     degree: str
@@ -158,4 +172,75 @@ class AchievementUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     year: Optional[str] = None
-    category: Optional[str] = None
\ No newline at end of file
+    category: Optional[str] = None
+
+# Aggregate Portfolio Model
+class Portfolio(BaseModel):
+    personalInfo: Optional[PersonalInfo] = None
+    experience: Optional[List[Experience]] = None
+    projects: Optional[List[Project]] = None
+    skills: Optional[List[Skill]] = None
+    education: Optional[List[Education]] = None
+    achievements: Optional[List[Achievement]] = None
+
+# Keyset Pagination Model
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    nextCursor: Optional[str] = None
+
+class FacetedPage(Page[T], Generic[T]):
+    facets: Dict[str, Dict[str, int]]  # facet -> value -> matching documents
+
+# Bulk Write Models
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str  # "inserted", "created" (upserted), "updated" or "error"
+    error: Optional[str] = None
+
+class BulkWriteSummary(BaseModel):
+    inserted: int
+    upserted: int
+    matched: int
+    modified: int
+    failed: int
+    results: List[BulkItemResult]
+
+# Search Models
+class SearchHit(BaseModel):
+    collection: str
+    id: str
+    title: str
+    score: float
+
+class SearchResults(BaseModel):
+    query: str
+    total: int
+    hits: List[SearchHit]
+
+# Partial Models (sparse fieldset responses: every field optional)
+def partial_model(model):
+    return create_model(
+        f"{model.__name__}Partial",
+        __base__=BaseModel,
+        **{name: (Optional[field.annotation], None) for name, field in model.model_fields.items()}
+    )
+
+PersonalInfoPartial = partial_model(PersonalInfo)
+ExperiencePartial = partial_model(Experience)
+ProjectPartial = partial_model(Project)
+SkillPartial = partial_model(Skill)
+EducationPartial = partial_model(Education)
+AchievementPartial = partial_model(Achievement)
+
+# Model stored in each collection
+COLLECTION_MODELS = {
+    "personal_info": PersonalInfo,
+    "experience": Experience,
+    "projects": Project,
+    "skills": Skill,
+    "education": Education,
+    "achievements": Achievement,
+}
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination over the list endpoints' sort keys.
+
+Every ordering is made total by appending `id` as a tie-breaker, and a page
+continues strictly after the last document of the previous one, so inserts
+made between requests never shift or duplicate entries.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# Cursors come from clients: only plain scalars may reach the query, never operator documents
+CURSOR_VALUE_TYPES = (str, int, float, bool, type(None))
+
+
+class Keyset:
+    """Sort on `field` in `direction`, then on `id` in the same direction"""
+
+    def __init__(self, field, direction, is_datetime=False):
+        self.field = field
+        self.direction = direction
+        self.is_datetime = is_datetime
+
+    @property
+    def sort(self):
+        return [(self.field, self.direction), ("id", self.direction)]
+
+    def encode(self, doc):
+        value = doc.get(self.field)
+        if self.is_datetime and value is not None:
+            value = value.isoformat()
+        raw = json.dumps([value, doc["id"]], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            value, last_id = json.loads(raw)
+            if not isinstance(last_id, str):
+                raise ValueError("cursor id must be a string")
+            if not isinstance(value, CURSOR_VALUE_TYPES):
+                raise ValueError("cursor value must be a scalar")
+            if self.is_datetime and value is not None:
+                if not isinstance(value, str):
+                    raise ValueError("cursor value must be an ISO 8601 datetime")
+                value = datetime.fromisoformat(value)
+                if value.tzinfo is not None:
+                    # Stored datetimes are naive UTC
+                    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        except (ValueError, TypeError, UnicodeDecodeError) as e:
+            raise InvalidCursor(str(e)) from e
+        return value, last_id
+
+    def after(self, cursor):
+        """Filter matching the documents that sort strictly after `cursor`"""
+        value, last_id = self.decode(cursor)
+        op = "$gt" if self.direction == 1 else "$lt"
+        return {
+            "$or": [
+                {self.field: {op: value}},
+                {self.field: value, "id": {op: last_id}},
+            ]
+        }
+
+
+async def fetch_page(repository, query, keyset, cursor, limit, projection=None):
+    """Read one page; returns (documents, next cursor or None)
+
+    A `projection` must include the keyset field and `id` for the cursor to be built.
+    """
+    if cursor:
+        after = keyset.after(cursor)
+        query = {"$and": [query, after]} if query else after
+
+    documents = await repository.find(query, projection, sort=keyset.sort, limit=limit + 1)
+    if len(documents) > limit:
+        documents = documents[:limit]
+        return documents, keyset.encode(documents[-1])
+    return documents, None
+
+
+# Sort orders of the list endpoints
+CREATED_AT_KEYSET = Keyset("createdAt", -1, is_datetime=True)
+SKILLS_KEYSET = Keyset("category", 1)
+ACHIEVEMENTS_KEYSET = Keyset("year", -1)
@@ -0,0 +1,201 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is
+picked by PROFILE_SAMPLE_RATE (a fraction of all requests). While it runs:
+
+  * a sampling thread records the event loop thread's stack every
+    PROFILE_INTERVAL_MS and writes the samples in collapsed-stack format
+    (`<dir>/<stamp>-<route>.folded`), ready for flamegraph.pl, inferno or
+    speedscope;
+  * the read path times its phases (`mongo` awaits, response-model
+    `validation`, JSON `serialization`, body `compression`), reported in
+    a `.json` summary next to the flamegraph and, for header-triggered
+    requests, in a `Server-Timing` response header.
+
+The sampler sees the whole event loop thread, so requests served
+concurrently on the same worker show up in the flamegraph too; the phase
+timings belong to the profiled request alone, but are summed across its
+own concurrent awaits (e.g. /api/portfolio's sections), so they can add
+up to more than the total.
+
+With neither PROFILE_TOKEN nor PROFILE_SAMPLE_RATE set, the middleware is
+not installed and `phase()` returns a shared no-op context manager.
+"""
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "profiles"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "1"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "200"))
+PROFILE_HEADER = b"x-profile"
+
+ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+_current_profile = ContextVar("request_profile", default=None)
+_NO_PHASE = nullcontext()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+if ENABLED:
+    def phase(name):
+        """Time a block under `name` when the current request is being profiled"""
+        profile = _current_profile.get()
+        return profile.phase(name) if profile is not None else _NO_PHASE
+else:
+    def phase(name):
+        return _NO_PHASE
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold(frame):
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def route_slug(scope):
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or scope["path"]
+    return re.sub(r"[^A-Za-z0-9]+", "-", f"{scope['method']} {path}").strip("-")
+
+
+def write_profile(directory, name, stacks, summary, keep=PROFILE_KEEP):
+    directory.mkdir(parents=True, exist_ok=True)
+    folded = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    (directory / f"{name}.folded").write_text(folded)
+    (directory / f"{name}.json").write_text(json.dumps(summary, indent=2))
+    if keep > 0:
+        prune_profiles(directory, keep)
+
+
+def prune_profiles(directory, keep):
+    """Delete all but the newest `keep` profiles; names start with their timestamp, so they sort by age"""
+    names = sorted(path.stem for path in directory.glob("*.json"))
+    for name in names[:-keep]:
+        for suffix in (".json", ".folded"):
+            (directory / f"{name}{suffix}").unlink(missing_ok=True)
+
+
+def server_timing(phases, total):
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries).encode()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling header-requested or sampled requests"""
+
+    def __init__(self, app, token=PROFILE_TOKEN, sample_rate=PROFILE_SAMPLE_RATE,
+                 directory=PROFILE_DIR, interval_ms=PROFILE_INTERVAL_MS, keep=PROFILE_KEEP):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.interval = interval_ms / 1000
+        self.keep = keep
+
+    def requested(self, scope):
+        if not self.token:
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self.requested(scope)
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        status = 500
+        reset = _current_profile.set(profile)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if requested:
+                    timing = server_timing(profile.phases, time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing)]}
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            total = time.perf_counter() - start
+            sampler.stop()
+            _current_profile.reset(reset)
+            name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{route_slug(scope)}"
+            summary = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status,
+                "trigger": "header" if requested else "sampled",
+                "totalMs": round(total * 1000, 3),
+                "phasesMs": {key: round(value * 1000, 3) for key, value in profile.phases.items()},
+                "samples": sum(sampler.stacks.values()),
+                "intervalMs": self.interval * 1000,
+            }
+            await asyncio.to_thread(write_profile, self.directory, name, sampler.stacks, summary, self.keep)
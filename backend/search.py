@@ -0,0 +1,181 @@
+"""
+In-process full-text search over the portfolio content.
+
+An inverted index (term -> {document: weighted term frequency}) is built
+at startup and kept current by the write handlers. Queries are tokenized
+like documents; each query term matches itself exactly and, with a lower
+weight, every indexed term it is a prefix of (found by bisecting a sorted
+vocabulary). Documents are ranked with BM25.
+"""
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Searchable fields per collection, with their term-frequency weight
+SEARCH_FIELDS = {
+    "projects": {"title": 3, "technologies": 2, "description": 1, "highlights": 1},
+    "experience": {"achievements": 1},
+    "skills": {"description": 1},
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def field_tokens(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [token for item in value for token in tokenize(str(item))]
+    return tokenize(str(value))
+
+
+def display_title(collection_name, document):
+    if collection_name == "experience":
+        return f"{document.get('role', '')} at {document.get('company', '')}".strip()
+    if collection_name == "skills":
+        return document.get("name", "")
+    return document.get("title", "")
+
+
+class SearchIndex:
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.clear()
+
+    def clear(self):
+        self._postings = {}      # term -> {doc_key: weighted tf}
+        self._terms = []         # sorted vocabulary, for prefix lookups
+        self._doc_terms = {}     # doc_key -> Counter of weighted tf
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._meta = {}          # doc_key -> hit fields
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    @staticmethod
+    def projection(collection_name):
+        fields = set(SEARCH_FIELDS[collection_name]) | {"id", "title", "name", "role", "company"}
+        return {**{field: 1 for field in fields}, "_id": 0}
+
+    async def build(self, db):
+        """(Re)build from every searchable collection"""
+        self.clear()
+        for collection_name in SEARCH_FIELDS:
+            await self.reload(db, collection_name)
+
+    async def reload(self, db, collection_name):
+        """Re-read one collection, e.g. after a change that only names a Mongo `_id`"""
+        if collection_name not in SEARCH_FIELDS:
+            return
+        documents = await db.collection(collection_name).find({}, self.projection(collection_name))
+        # Swap synchronously so concurrent searches never see a half-loaded collection
+        for doc_key in [doc_key for doc_key in self._doc_terms if doc_key[0] == collection_name]:
+            self.remove(*doc_key)
+        for document in documents:
+            self.index(collection_name, document)
+
+    async def refresh(self, collection_name, repository, ids):
+        """Re-index the given ids from the database, e.g. after a bulk write"""
+        if collection_name not in SEARCH_FIELDS or not ids:
+            return
+        for document in await repository.find({"id": {"$in": list(ids)}}, self.projection(collection_name)):
+            self.index(collection_name, document)
+
+    def index(self, collection_name, document):
+        """Add or replace one document"""
+        weights = SEARCH_FIELDS.get(collection_name)
+        if weights is None or not document.get("id"):
+            return
+        doc_key = (collection_name, document["id"])
+        self.remove(collection_name, document["id"])
+
+        terms = Counter()
+        for field, weight in weights.items():
+            for token in field_tokens(document.get(field)):
+                terms[token] += weight
+        length = sum(terms.values())
+
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[doc_key] = frequency
+        self._doc_terms[doc_key] = terms
+        self._doc_lengths[doc_key] = length
+        self._total_length += length
+        self._meta[doc_key] = {
+            "collection": collection_name,
+            "id": document["id"],
+            "title": display_title(collection_name, document),
+        }
+
+    def remove(self, collection_name, document_id):
+        doc_key = (collection_name, document_id)
+        terms = self._doc_terms.pop(doc_key, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_key]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self._total_length -= self._doc_lengths.pop(doc_key)
+        del self._meta[doc_key]
+
+    def _expand(self, term):
+        """(indexed term, weight) pairs matching `term` exactly or as a prefix"""
+        matches = []
+        if term in self._postings:
+            matches.append((term, 1.0))
+        position = bisect_left(self._terms, term)
+        while position < len(self._terms) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            candidate = self._terms[position]
+            if not candidate.startswith(term):
+                break
+            if candidate != term:
+                matches.append((candidate, PREFIX_WEIGHT))
+            position += 1
+        return matches
+
+    def search(self, query, limit=20, collections=None):
+        """Returns (total matches, top `limit` hits ordered by BM25 score)"""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        document_count = len(self._doc_lengths)
+        if not query_terms or not document_count:
+            return 0, []
+        average_length = self._total_length / document_count
+
+        scores = Counter()
+        for query_term in query_terms:
+            best = {}
+            for term, weight in self._expand(query_term):
+                postings = self._postings[term]
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_key, frequency in postings.items():
+                    if collections and doc_key[0] not in collections:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_key] / average_length)
+                    score = weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+                    if score > best.get(doc_key, 0.0):
+                        best[doc_key] = score
+            scores.update(best)
+
+        ranked = scores.most_common(limit)
+        return len(scores), [{**self._meta[doc_key], "score": round(score, 4)} for doc_key, score in ranked]
+
+    def stats(self):
+        return {"documents": len(self._doc_lengths), "terms": len(self._postings)}
+
+
+search_index = SearchIndex()
@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
 """
 Database seeding script to populate the portfolio database with initial data
+
+Seeding is idempotent: every document is upserted on its natural key, so
+re-running the script updates the existing entries instead of duplicating
+them. All collections are seeded concurrently with batched bulk writes.
+
+    python seed_data.py              # upsert the portfolio content
+    python seed_data.py --reset      # clear the collections first
+    python seed_data.py --scale 5000 # add 5000 synthetic documents per collection
+
+It seeds whichever storage engine STORAGE_ENGINE selects (e.g. a SQLite file).
 """
+import argparse
 import asyncio
-from datetime import datetime
-from database import (
-    personal_info_collection,
-    experience_collection,
-    projects_collection,
-    skills_collection,
-    education_collection,
-    achievements_collection,
-    close_database_connection
-)
+import time
+import uuid
+from database import open_storage
+from indexes import ensure_indexes
+from storage import Upsert
 from models import (
     PersonalInfo, Experience, Project, Skill, Education, Achievement
 )
@@ -162,62 +168,142 @@ ACHIEVEMENTS_DATA = [
     }
 ]
 
-async def seed_database():
+# Fields identifying a seeded document across runs
+NATURAL_KEYS = {
+    "personal_info": ("email",),
+    "experience": ("company", "role"),
+    "projects": ("title",),
+    "skills": ("category", "name"),
+    "education": ("degree", "institution"),
+    "achievements": ("title",),
+}
+
+SEED_NAMESPACE = uuid.UUID("6f1c8a52-0c36-4b8e-9a57-3f1d2a7e5b10")
+BATCH_SIZE = 1000
+
+
+def seed_id(collection_name, natural_key):
+    """Deterministic id, so a document keeps its id however often it is re-seeded"""
+    return str(uuid.uuid5(SEED_NAMESPACE, f"{collection_name}:{natural_key}"))
+
+
+def upsert_operation(collection_name, model, data, synthetic=False):
+    document = model(**data).dict()
+    natural_key = tuple(document[field] for field in NATURAL_KEYS[collection_name])
+    document_id = seed_id(collection_name, natural_key)
+    created_at = document.pop("createdAt")
+    document.pop("id")
+    # Synthetic documents are keyed on their deterministic id so large
+    # batches are matched through the unique id index
+    key_filter = (
+        {"id": document_id} if synthetic
+        else {field: document[field] for field in NATURAL_KEYS[collection_name]}
+    )
+    return Upsert(key_filter, document, {"id": document_id, "createdAt": created_at})
+
+
+# Synthetic data for capacity testing
+def synthetic_experience(count):
+    for i in range(count):
+        yield {
+            **EXPERIENCE_DATA,
+            "company": f"Synthetic Company {i:06d}",
+            "isCurrentJob": False,
+        }
+
+
+def synthetic_projects(count):
+    for i in range(count):
+        template = PROJECTS_DATA[i % len(PROJECTS_DATA)]
+        yield {
+            **template,
+            "title": f"Synthetic Project {i:06d}",
+            "isFeatured": i % 10 == 0,
+        }
+
+
+def synthetic_skills(count):
+    for i in range(count):
+        template = SKILLS_DATA[i % len(SKILLS_DATA)]
+        yield {
+            **template,
+            "name": f"{template['name']} {i:06d}",
+            "level": (template["level"] + i) % 101,
+        }
+
+
+def synthetic_education(count):
+    for i in range(count):
+        yield {**EDUCATION_DATA, "degree": f"Synthetic Degree {i:06d}"}
+
+
+def synthetic_achievements(count):
+    for i in range(count):
+        template = ACHIEVEMENTS_DATA[i % len(ACHIEVEMENTS_DATA)]
+        yield {
+            **template,
+            "title": f"Synthetic Achievement {i:06d}",
+            "year": str(2000 + i % 25),
+        }
+
+
+# (collection name, model, seed documents, synthetic generator)
+SEED_PLAN = [
+    ("personal_info", PersonalInfo, [PERSONAL_INFO], None),
+    ("experience", Experience, [EXPERIENCE_DATA], synthetic_experience),
+    ("projects", Project, PROJECTS_DATA, synthetic_projects),
+    ("skills", Skill, SKILLS_DATA, synthetic_skills),
+    ("education", Education, [EDUCATION_DATA], synthetic_education),
+    ("achievements", Achievement, ACHIEVEMENTS_DATA, synthetic_achievements),
+]
+
+
+async def seed_collection(collection_name, repository, model, documents, synthetic, scale):
+    operations = [upsert_operation(collection_name, model, data) for data in documents]
+    if synthetic and scale:
+        operations += [
+            upsert_operation(collection_name, model, data, synthetic=True)
+            for data in synthetic(scale)
+        ]
+
+    upserted = modified = 0
+    for start in range(0, len(operations), BATCH_SIZE):
+        result = await repository.write_many(operations[start:start + BATCH_SIZE])
+        upserted += result["upserted"]
+        modified += result["modified"]
+    print(f"   • {collection_name}: {upserted} inserted, {modified} updated")
+
+
+async def seed_database(scale=0, reset=False, db=None):
     """Seed the database with initial data"""
     print("🌱 Starting database seeding...")
+    started = time.perf_counter()
+    owns_connection = db is None
+    db = db or open_storage()
     
     try:
-        # Clear existing data
-        print("🗑️  Clearing existing data...")
-        await personal_info_collection.delete_many({})
-        await experience_collection.delete_many({})
-        await projects_collection.delete_many({})
-        await skills_collection.delete_many({})
-        await education_collection.delete_many({})
-        await achievements_collection.delete_many({})
-        
-        # Seed Personal Info
-        print("👤 Seeding personal information...")
-        personal_info = PersonalInfo(**PERSONAL_INFO)
-        await personal_info_collection.insert_one(personal_info.dict())
-        
-        # Seed Experience
-        print("💼 Seeding experience data...")
-        experience = Experience(**EXPERIENCE_DATA)
-        await experience_collection.insert_one(experience.dict())
-        
-        # Seed Projects
-        print("🚀 Seeding projects data...")
-        for project_data in PROJECTS_DATA:
-            project = Project(**project_data)
-            await projects_collection.insert_one(project.dict())
-        
-        # Seed Skills
-        print("🛠️  Seeding skills data...")
-        for skill_data in SKILLS_DATA:
-            skill = Skill(**skill_data)
-            await skills_collection.insert_one(skill.dict())
-        
-        # Seed Education
-        print("🎓 Seeding education data...")
-        education = Education(**EDUCATION_DATA)
-        await education_collection.insert_one(education.dict())
-        
-        # Seed Achievements
-        print("🏆 Seeding achievements data...")
-        for achievement_data in ACHIEVEMENTS_DATA:
-            achievement = Achievement(**achievement_data)
-            await achievements_collection.insert_one(achievement.dict())
+        if reset:
+            print("🗑️  Clearing existing data...")
+            await asyncio.gather(*(
+                db.collection(name).clear() for name, _, _, _ in SEED_PLAN
+            ))
+
+        if db.engine == "mongo":
+            await ensure_indexes(db.database)
+
+        print(f"📦 Upserting all collections concurrently{f' (+{scale} synthetic documents each)' if scale else ''}...")
+        await asyncio.gather(*(
+            seed_collection(name, db.collection(name), model, documents, synthetic, scale)
+            for name, model, documents, synthetic in SEED_PLAN
+        ))
         
-        print("✅ Database seeding completed successfully!")
+        print(f"✅ Database seeding completed successfully in {time.perf_counter() - started:.2f}s!")
         
         # Print summary
-        personal_count = await personal_info_collection.count_documents({})
-        experience_count = await experience_collection.count_documents({})
-        projects_count = await projects_collection.count_documents({})
-        skills_count = await skills_collection.count_documents({})
-        education_count = await education_collection.count_documents({})
-        achievements_count = await achievements_collection.count_documents({})
+        counts = await asyncio.gather(*(
+            db.collection(name).count() for name, _, _, _ in SEED_PLAN
+        ))
+        personal_count, experience_count, projects_count, skills_count, education_count, achievements_count = counts
         
         print(f"""
 📊 Seeding Summary:
@@ -233,7 +319,13 @@ async def seed_database():
         print(f"❌ Error seeding database: {str(e)}")
         raise
     finally:
-        await close_database_connection()
+        if owns_connection:
+            db.close()
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the portfolio database")
+    parser.add_argument("--scale", type=int, default=0, metavar="N",
+                        help="also upsert N synthetic documents per collection (personal info excluded)")
+    parser.add_argument("--reset", action="store_true", help="delete existing documents before seeding")
+    args = parser.parse_args()
+    asyncio.run(seed_database(scale=args.scale, reset=args.reset))
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Opt-in fast JSON path (FAST_JSON=1).
+
+Documents were validated on the way in, so on the way out they are trusted:
+instead of re-validating through the response model, each document is
+reduced to the model's fields (in declaration order, defaults filled in,
+`_id` and unknown keys dropped) and encoded with orjson. The output is
+byte-for-byte what the validated pydantic path produces, while the route's
+`response_model` keeps the OpenAPI schema unchanged.
+"""
+import os
+import logging
+from functools import lru_cache
+from typing import Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def fast_json_enabled(environ=os.environ):
+    enabled = environ.get("FAST_JSON", "").lower() in ("1", "true", "yes")
+    if enabled and orjson is None:
+        logger.warning("FAST_JSON is set but orjson is not installed; using the validated JSON path")
+        return False
+    return enabled
+
+
+FAST_JSON = fast_json_enabled()
+
+
+@lru_cache(maxsize=None)
+def field_defaults(model):
+    """(name, default) for every model field, in declaration order"""
+    return tuple(
+        (name, field.get_default(call_default_factory=False))
+        for name, field in model.model_fields.items()
+    )
+
+
+@lru_cache(maxsize=None)
+def default_factories(model):
+    return {
+        name: field.default_factory
+        for name, field in model.model_fields.items()
+        if field.default_factory is not None
+    }
+
+
+def trusted_document(model, document, exclude_unset=False):
+    if document is None:
+        return None
+    if exclude_unset:
+        return {name: document[name] for name, _ in field_defaults(model) if name in document}
+    factories = default_factories(model)
+    return {
+        name: document[name] if name in document
+        else factories[name]() if name in factories
+        else default
+        for name, default in field_defaults(model)
+    }
+
+
+def _page_item_model(response_type):
+    if isinstance(response_type, type) and issubclass(response_type, BaseModel):
+        args = response_type.__pydantic_generic_metadata__.get("args")
+        if args and "items" in response_type.model_fields:
+            return args[0]
+    return None
+
+
+def trusted(response_type, value, exclude_unset=False):
+    """Shape raw documents like `response_type` would, without validating them"""
+    origin = get_origin(response_type)
+    if origin is list:
+        (model,) = get_args(response_type)
+        return [trusted_document(model, document, exclude_unset) for document in value]
+    if origin is Union:
+        if value is None:
+            return None
+        (model,) = [arg for arg in get_args(response_type) if arg is not type(None)]
+        return trusted(model, value, exclude_unset)
+    item_model = _page_item_model(response_type)
+    if item_model is not None:
+        return {
+            **value,
+            "items": [trusted_document(item_model, document, exclude_unset) for document in value["items"]],
+        }
+    return trusted_document(response_type, value, exclude_unset)
+
+
+def dump_trusted(response_type, value, exclude_unset=False):
+    """Returns (trusted data, JSON bytes)"""
+    data = trusted(response_type, value, exclude_unset)
+    return data, orjson.dumps(data)
+
+
+def dump_model(instance):
+    """JSON bytes for an already validated model instance"""
+    return orjson.dumps(instance.__dict__)
+
+
+def encode_document(model, document):
+    """JSON bytes for one stored document, trusted or validated depending on FAST_JSON"""
+    if FAST_JSON:
+        return orjson.dumps(trusted_document(model, document))
+    return model.__pydantic_serializer__.to_json(model.model_validate(document))
@@ -1,39 +1,121 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Body, Depends, HTTPException, Query, Request, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.responses import StreamingResponse
 import os
+import asyncio
+import hashlib
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional, Union
 from datetime import datetime
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from pydantic import TypeAdapter
 
 # Import models
 from models import (
     PersonalInfo, PersonalInfoUpdate,
     Experience, ExperienceCreate, ExperienceUpdate,
     Project, ProjectCreate, ProjectUpdate,
-    Skill, SkillCreate, SkillUpdate,
+    Skill, SkillCreate, SkillUpdate, SkillGroup, GroupedSkill,
     Education, EducationCreate, EducationUpdate,
-    Achievement, AchievementCreate, AchievementUpdate
+    Achievement, AchievementCreate, AchievementUpdate,
+    Portfolio, Page, FacetedPage, BulkWriteSummary, SearchResults,
+    PersonalInfoPartial, ExperiencePartial, ProjectPartial,
+    SkillPartial, EducationPartial, AchievementPartial,
+    COLLECTION_MODELS
 )
 
 # Import database
-from database import (
-    personal_info_collection,
-    experience_collection,
-    projects_collection,
-    skills_collection,
-    education_collection,
-    achievements_collection,
-    close_database_connection
+from database import COLLECTION_NAMES, open_storage, get_database
+from storage import Storage
+from storage.documents import sort_key
+from indexes import ensure_indexes
+from seed_data import seed_database
+
+# Import response cache and conditional GET helpers
+from cache import response_cache, cache_fills, CachedBody
+from conditional import is_not_modified, validator_headers, latest_update, newest
+
+# Import keyset pagination
+from pagination import (
+    InvalidCursor, fetch_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    CREATED_AT_KEYSET, SKILLS_KEYSET, ACHIEVEMENTS_KEYSET
 )
 
+# Import sparse fieldset helpers
+from fieldsets import select_fields, projection, restrict, fields_key
+
+PARTIAL_MODELS = {
+    Experience: ExperiencePartial,
+    Project: ProjectPartial,
+    Skill: SkillPartial,
+    Education: EducationPartial,
+    Achievement: AchievementPartial,
+}
+
+# Import fast JSON path
+from serialization import FAST_JSON, dump_trusted, dump_model, trusted_document
+
+# Import response compression
+from compression import CompressionMiddleware, negotiate, compress, MIN_SIZE as COMPRESSION_MIN_SIZE
+
+# Import streaming export
+from export import ndjson_lines, ndjson_chunks
+
+# Import bulk write helper
+from bulk import bulk_upsert, MAX_BULK_ITEMS
+
+# Import faceted project filtering
+from facets import facet_query, facet_counts, filters_key
+
+# Import full-text search
+from search import search_index, SEARCH_FIELDS
+
+# Import change-stream invalidation
+from changes import ChangeWatcher, change_streams_enabled
+
+# Import per-request profiling
+from profiling import ENABLED as PROFILING, ProfilingMiddleware, phase
+
+# Import admission control (rate limiting and concurrency cap)
+from admission import AdmissionMiddleware
+
+# Import Prometheus metrics
+from metrics import METRICS, CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry, mongo_listeners
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the storage engine (for MongoDB, the Motor client and its pool) for the lifetime of this worker"""
+    db = open_storage(event_listeners=mongo_listeners())
+    try:
+        await db.warm_up()
+        if db.engine == "mongo":
+            await ensure_indexes(db.database)
+        elif db.engine == "memory":
+            await seed_database(db=db)  # nothing persists between runs
+        await search_index.build(db)
+    except Exception:
+        logger.exception("Database warm-up failed; continuing, the driver will reconnect lazily")
+    app.state.db = db
+    # Apply writes made through other instances to this worker's caches
+    watch = db.engine == "mongo" and change_streams_enabled()
+    app.state.change_watcher = ChangeWatcher(db) if watch else None
+    if app.state.change_watcher is not None:
+        app.state.change_watcher.start()
+    try:
+        yield
+    finally:
+        if app.state.change_watcher is not None:
+            await app.state.change_watcher.stop()
+        db.close()
+
 # Create the main app without a prefix
-app = FastAPI(title="Portfolio API", version="1.0.0")
+app = FastAPI(title="Portfolio API", version="1.0.0", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -44,189 +126,660 @@ def document_to_dict(doc):
         doc["_id"] = str(doc["_id"])
     return doc
 
+@lru_cache(maxsize=None)
+def type_adapter(response_type):
+    return TypeAdapter(response_type)
+
+async def fetch_all(documents):
+    return [document_to_dict(doc) for doc in await documents]
+
+async def cached_json_body(collection_name, key, response_type, load, exclude_unset=False):
+    """Return the serialized JSON for a read, filling the response cache from `load` on a miss
+
+    Identical misses arriving while one is being filled await that fill instead of
+    reading again. A fill started before a write is neither joined nor cached.
+    An expired entry still within CACHE_MAX_STALE_SECONDS is returned as is, and
+    refreshed in the background.
+    """
+    cached, fresh = response_cache.lookup(collection_name, key)
+    if fresh:
+        return cached
+    generation = response_cache.generation(collection_name)
+    fill = lambda: fill_cache(collection_name, key, generation, response_type, load, exclude_unset)
+    if cached is not None:
+        cache_fills.refresh(collection_name, (key, generation), fill)
+        return cached
+    return await cache_fills.run(collection_name, (key, generation), fill)
+
+async def fill_cache(collection_name, key, generation, response_type, load, exclude_unset):
+    with phase("mongo"):
+        loaded = await load()
+    if FAST_JSON:
+        with phase("serialization"):
+            value, body = dump_trusted(response_type, loaded, exclude_unset=exclude_unset)
+    else:
+        adapter = type_adapter(response_type)
+        with phase("validation"):
+            value = adapter.validate_python(loaded)
+        with phase("serialization"):
+            body = adapter.dump_json(value, exclude_unset=exclude_unset)
+    cached = CachedBody(
+        body,
+        last_modified=newest(latest_update(value), response_cache.last_write(collection_name)),
+    )
+    if response_cache.generation(collection_name) == generation:
+        response_cache.set(collection_name, key, cached)
+    return cached
+
+def json_response(request, cached):
+    """Send a cached body, precompressed if negotiated, or a bodiless 304 when the client's validators still match"""
+    encoding = None
+    if len(cached.body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+    etag = cached.encoded_etag(encoding) if encoding else cached.etag
+    headers = validator_headers(etag, cached.last_modified)
+    headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(request.headers, etag, cached.last_modified):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    with phase("compression"):
+        body = cached.encoded(encoding, compress)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def write_response(model, value):
+    """Response for a write handler; the fast path encodes the stored document as trusted"""
+    if not FAST_JSON:
+        return value
+    if isinstance(value, model):
+        body = dump_model(value)
+    else:
+        body = dump_trusted(model, value)[1]
+    return Response(content=body, media_type="application/json")
+
+async def cached_list_body(collection_name, key, model, collection, query, keyset, selected=None):
+    """Cached JSON for a whole sorted collection, optionally restricted to `selected` fields"""
+    return await cached_json_body(
+        collection_name, fields_key(key, selected),
+        List[model] if selected is None else List[PARTIAL_MODELS[model]],
+        lambda: fetch_all(collection.find(query, projection(selected), sort=keyset.sort)),
+        exclude_unset=selected is not None,
+    )
+
+async def cached_page_body(collection_name, key, model, collection, query, keyset, cursor, limit, selected=None):
+    """Cached JSON for one keyset page of `collection`"""
+    limit = limit or DEFAULT_PAGE_SIZE
+
+    async def load():
+        try:
+            documents, next_cursor = await fetch_page(
+                collection, query, keyset, cursor, limit,
+                projection=projection(selected, extra=(keyset.field,))
+            )
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        return {
+            "items": [restrict(document_to_dict(doc), selected) for doc in documents],
+            "nextCursor": next_cursor,
+        }
+
+    return await cached_json_body(
+        collection_name, fields_key(f"{key}:page:{limit}:{cursor or ''}", selected),
+        Page[model] if selected is None else Page[PARTIAL_MODELS[model]],
+        load,
+        exclude_unset=selected is not None,
+    )
+
+def list_response_model(model):
+    """Full or partial documents, as a plain list or as a keyset page"""
+    partial = PARTIAL_MODELS[model]
+    return Union[List[model], Page[model], List[partial], Page[partial]]
+
+async def bulk_write_items(collection_name, collection, create_model, model, items):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} items per bulk request")
+    summary = await bulk_upsert(collection, create_model, model, items)
+    if summary["failed"] < len(items):
+        response_cache.invalidate(collection_name)
+        await search_index.refresh(
+            collection_name, collection,
+            [result["id"] for result in summary["results"] if result["status"] != "error"]
+        )
+    return summary
+
+# Cached reads, shared by the collection endpoints and the aggregate endpoint
+async def personal_info_body(db, selected=None):
+    return await cached_json_body(
+        "personal_info", fields_key("one", selected),
+        Optional[PersonalInfo] if selected is None else Optional[PersonalInfoPartial],
+        lambda: db.personal_info.find_one({}, projection(selected)),
+        exclude_unset=selected is not None,
+    )
+
+async def experience_body(db, selected=None):
+    return await cached_list_body(
+        "experience", "all", Experience, db.experience, {}, CREATED_AT_KEYSET, selected
+    )
+
+async def projects_body(db, selected=None):
+    return await cached_list_body(
+        "projects", "all", Project, db.projects, {}, CREATED_AT_KEYSET, selected
+    )
+
+async def featured_projects_body(db, selected=None):
+    return await cached_list_body(
+        "projects", "featured", Project, db.projects, {"isFeatured": True}, CREATED_AT_KEYSET, selected
+    )
+
+async def filtered_projects_body(db, filters, cursor, limit, selected=None):
+    """Cached keyset page of the projects matching `filters`, with facet counts, read concurrently"""
+    limit = limit or DEFAULT_PAGE_SIZE
+
+    async def load():
+        try:
+            (documents, next_cursor), facets = await asyncio.gather(
+                fetch_page(
+                    db.projects, facet_query(filters), CREATED_AT_KEYSET, cursor, limit,
+                    projection=projection(selected, extra=(CREATED_AT_KEYSET.field,))
+                ),
+                facet_counts(db.projects, filters),
+            )
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        return {
+            "items": [restrict(document_to_dict(doc), selected) for doc in documents],
+            "nextCursor": next_cursor,
+            "facets": facets,
+        }
+
+    return await cached_json_body(
+        "projects", fields_key(f"filter:{filters_key(filters)}:{limit}:{cursor or ''}", selected),
+        FacetedPage[Project] if selected is None else FacetedPage[ProjectPartial],
+        load,
+        exclude_unset=selected is not None,
+    )
+
+async def skills_body(db, selected=None):
+    return await cached_list_body(
+        "skills", "all", Skill, db.skills, {}, SKILLS_KEYSET, selected
+    )
+
+# Skills in list order, grouped by category with per-category count and average level
+SKILL_GROUPS_PIPELINE = [
+    {"$project": {"_id": 0}},
+    {"$sort": dict(SKILLS_KEYSET.sort)},
+    {"$group": {
+        "_id": "$category",
+        "count": {"$sum": 1},
+        "averageLevel": {"$avg": "$level"},
+        "skills": {"$push": "$$ROOT"},
+    }},
+    {"$sort": {"_id": 1}},
+]
+
+async def skill_groups(skills):
+    """SKILL_GROUPS_PIPELINE's result; engines without aggregation group a sorted read here"""
+    if skills.native is not None:
+        return await skills.native.aggregate(SKILL_GROUPS_PIPELINE).to_list(None)
+    groups = {}
+    for skill in await skills.find({}, {"_id": 0}, sort=SKILLS_KEYSET.sort):
+        group = groups.setdefault(skill.get("category"), {"_id": skill.get("category"), "skills": []})
+        group["skills"].append(skill)
+    for group in groups.values():
+        group["count"] = len(group["skills"])
+        group["averageLevel"] = sum(skill["level"] for skill in group["skills"]) / group["count"]
+    return sorted(groups.values(), key=lambda group: sort_key(group["_id"]))
+
+async def skill_groups_body(db):
+    async def load():
+        groups = await skill_groups(db.skills)
+        return [
+            {
+                "category": group["_id"],
+                "count": group["count"],
+                "averageLevel": round(group["averageLevel"], 1),
+                # Nested documents are not reshaped by the trusted path, so shape them here
+                "skills": [trusted_document(GroupedSkill, skill) for skill in group["skills"]],
+            }
+            for group in groups
+        ]
+
+    return await cached_json_body("skills", "grouped", List[SkillGroup], load)
+
+async def education_body(db, selected=None):
+    return await cached_list_body(
+        "education", "all", Education, db.education, {}, CREATED_AT_KEYSET, selected
+    )
+
+async def achievements_body(db, selected=None):
+    return await cached_list_body(
+        "achievements", "all", Achievement, db.achievements, {}, ACHIEVEMENTS_KEYSET, selected
+    )
+
+PORTFOLIO_SECTIONS = {
+    "personalInfo": personal_info_body,
+    "experience": experience_body,
+    "projects": projects_body,
+    "skills": skills_body,
+    "education": education_body,
+    "achievements": achievements_body,
+}
+
+async def portfolio_body(db, sections=None):
+    """Compose the cached section bodies into one document, reading the sections concurrently"""
+    sections = sections or list(PORTFOLIO_SECTIONS)
+    parts = await asyncio.gather(*(PORTFOLIO_SECTIONS[name](db) for name in sections))
+    etag = '"%s"' % hashlib.blake2b(
+        "".join(name + part.etag for name, part in zip(sections, parts)).encode(), digest_size=16
+    ).hexdigest()
+    # Content-addressed: the ETag identifies the composed body, so no invalidation is needed
+    cached = response_cache.get("portfolio", etag)
+    if cached is None:
+        body = b"{" + b",".join(b'"%s":%s' % (name.encode(), part.body) for name, part in zip(sections, parts)) + b"}"
+        cached = CachedBody(body, last_modified=newest(*(part.last_modified for part in parts)), etag=etag)
+        response_cache.set("portfolio", etag, cached)
+    return cached
+
 # Personal Information Endpoints
-@api_router.get("/personal-info", response_model=PersonalInfo)
-async def get_personal_info():
-    personal_info = await personal_info_collection.find_one()
-    if not personal_info:
+@api_router.get("/personal-info", response_model=Union[PersonalInfo, PersonalInfoPartial])
+async def get_personal_info(
+    request: Request,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    cached = await personal_info_body(db, select_fields(PersonalInfo, fields))
+    if cached.body == b"null":
         raise HTTPException(status_code=404, detail="Personal information not found")
-    return document_to_dict(personal_info)
+    return json_response(request, cached)
 
 @api_router.put("/personal-info", response_model=PersonalInfo)
-async def update_personal_info(personal_info: PersonalInfoUpdate):
-    existing_info = await personal_info_collection.find_one()
-    if not existing_info:
-        raise HTTPException(status_code=404, detail="Personal information not found")
-    
+async def update_personal_info(
+    personal_info: PersonalInfoUpdate,
+    db: Storage = Depends(get_database),
+):
     update_data = {k: v for k, v in personal_info.dict().items() if v is not None}
     update_data["updatedAt"] = datetime.utcnow()
     
-    await personal_info_collection.update_one(
-        {"_id": existing_info["_id"]},
-        {"$set": update_data}
-    )
-    
-    updated_info = await personal_info_collection.find_one({"_id": existing_info["_id"]})
-    return document_to_dict(updated_info)
+    updated_info = await db.personal_info.update({}, update_data)
+    if not updated_info:
+        raise HTTPException(status_code=404, detail="Personal information not found")
+    response_cache.invalidate("personal_info")
+    return write_response(PersonalInfo, updated_info)
 
 # Experience Endpoints
-@api_router.get("/experience", response_model=List[Experience])
-async def get_all_experience():
-    experiences = []
-    async for experience in experience_collection.find().sort("createdAt", -1):
-        experiences.append(document_to_dict(experience))
-    return experiences
+@api_router.get("/experience", response_model=list_response_model(Experience))
+async def get_all_experience(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    selected = select_fields(Experience, fields)
+    if limit is None and cursor is None:
+        return json_response(request, await experience_body(db, selected))
+    return json_response(request, await cached_page_body(
+        "experience", "all", Experience, db.experience, {}, CREATED_AT_KEYSET, cursor, limit, selected
+    ))
 
 @api_router.post("/experience", response_model=Experience)
-async def create_experience(experience: ExperienceCreate):
+async def create_experience(
+    experience: ExperienceCreate,
+    db: Storage = Depends(get_database),
+):
     experience_dict = experience.dict()
     experience_obj = Experience(**experience_dict)
-    result = await experience_collection.insert_one(experience_obj.dict())
-    created_experience = await experience_collection.find_one({"_id": result.inserted_id})
-    return document_to_dict(created_experience)
+    await db.experience.insert(experience_obj.dict())
+    response_cache.invalidate("experience")
+    search_index.index("experience", experience_obj.dict())
+    return write_response(Experience, experience_obj)
+
+@api_router.post("/experience/bulk", response_model=BulkWriteSummary)
+async def bulk_create_experience(
+    items: List[Any] = Body(...),
+    db: Storage = Depends(get_database),
+):
+    return await bulk_write_items("experience", db.experience, ExperienceCreate, Experience, items)
 
 @api_router.put("/experience/{experience_id}", response_model=Experience)
-async def update_experience(experience_id: str, experience: ExperienceUpdate):
-    existing_experience = await experience_collection.find_one({"id": experience_id})
-    if not existing_experience:
-        raise HTTPException(status_code=404, detail="Experience not found")
-    
+async def update_experience(
+    experience_id: str,
+    experience: ExperienceUpdate,
+    db: Storage = Depends(get_database),
+):
     update_data = {k: v for k, v in experience.dict().items() if v is not None}
     update_data["updatedAt"] = datetime.utcnow()
     
-    await experience_collection.update_one(
-        {"id": experience_id},
-        {"$set": update_data}
-    )
-    
-    updated_experience = await experience_collection.find_one({"id": experience_id})
-    return document_to_dict(updated_experience)
+    updated_experience = await db.experience.update({"id": experience_id}, update_data)
+    if not updated_experience:
+        raise HTTPException(status_code=404, detail="Experience not found")
+    response_cache.invalidate("experience")
+    search_index.index("experience", updated_experience)
+    return write_response(Experience, updated_experience)
 
 @api_router.delete("/experience/{experience_id}")
-async def delete_experience(experience_id: str):
-    result = await experience_collection.delete_one({"id": experience_id})
-    if result.deleted_count == 0:
+async def delete_experience(experience_id: str, db: Storage = Depends(get_database)):
+    if not await db.experience.delete({"id": experience_id}):
         raise HTTPException(status_code=404, detail="Experience not found")
+    response_cache.invalidate("experience")
+    search_index.remove("experience", experience_id)
     return {"message": "Experience deleted successfully"}
 
 # Project Endpoints
-@api_router.get("/projects", response_model=List[Project])
-async def get_all_projects():
-    projects = []
-    async for project in projects_collection.find().sort("createdAt", -1):
-        projects.append(document_to_dict(project))
-    return projects
-
-@api_router.get("/projects/featured", response_model=List[Project])
-async def get_featured_projects():
-    projects = []
-    async for project in projects_collection.find({"isFeatured": True}).sort("createdAt", -1):
-        projects.append(document_to_dict(project))
-    return projects
+@api_router.get("/projects", response_model=list_response_model(Project))
+async def get_all_projects(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    selected = select_fields(Project, fields)
+    if limit is None and cursor is None:
+        return json_response(request, await projects_body(db, selected))
+    return json_response(request, await cached_page_body(
+        "projects", "all", Project, db.projects, {}, CREATED_AT_KEYSET, cursor, limit, selected
+    ))
+
+@api_router.get("/projects/featured", response_model=list_response_model(Project))
+async def get_featured_projects(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    selected = select_fields(Project, fields)
+    if limit is None and cursor is None:
+        return json_response(request, await featured_projects_body(db, selected))
+    return json_response(request, await cached_page_body(
+        "projects", "featured", Project, db.projects, {"isFeatured": True}, CREATED_AT_KEYSET, cursor, limit, selected
+    ))
+
+@api_router.get("/projects/filter", response_model=Union[FacetedPage[Project], FacetedPage[ProjectPartial]])
+async def filter_projects(
+    request: Request,
+    category: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    type: Optional[List[str]] = Query(None),
+    technologies: Optional[List[str]] = Query(None),
+    isFeatured: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    """Projects matching every given facet (any of its values), with counts for each facet value"""
+    filters = {
+        "category": category,
+        "status": status,
+        "type": type,
+        "technologies": technologies,
+        "isFeatured": None if isFeatured is None else [isFeatured],
+    }
+    filters = {field: values for field, values in filters.items() if values}
+    return json_response(request, await filtered_projects_body(
+        db, filters, cursor, limit, select_fields(Project, fields)
+    ))
 
 @api_router.post("/projects", response_model=Project)
-async def create_project(project: ProjectCreate):
+async def create_project(project: ProjectCreate, db: Storage = Depends(get_database)):
     project_dict = project.dict()
     project_obj = Project(**project_dict)
-    result = await projects_collection.insert_one(project_obj.dict())
-    created_project = await projects_collection.find_one({"_id": result.inserted_id})
-    return document_to_dict(created_project)
+    await db.projects.insert(project_obj.dict())
+    response_cache.invalidate("projects")
+    search_index.index("projects", project_obj.dict())
+    return write_response(Project, project_obj)
+
+@api_router.post("/projects/bulk", response_model=BulkWriteSummary)
+async def bulk_create_projects(
+    items: List[Any] = Body(...),
+    db: Storage = Depends(get_database),
+):
+    return await bulk_write_items("projects", db.projects, ProjectCreate, Project, items)
 
 @api_router.put("/projects/{project_id}", response_model=Project)
-async def update_project(project_id: str, project: ProjectUpdate):
-    existing_project = await projects_collection.find_one({"id": project_id})
-    if not existing_project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
+async def update_project(
+    project_id: str,
+    project: ProjectUpdate,
+    db: Storage = Depends(get_database),
+):
     update_data = {k: v for k, v in project.dict().items() if v is not None}
     update_data["updatedAt"] = datetime.utcnow()
     
-    await projects_collection.update_one(
-        {"id": project_id},
-        {"$set": update_data}
-    )
-    
-    updated_project = await projects_collection.find_one({"id": project_id})
-    return document_to_dict(updated_project)
+    updated_project = await db.projects.update({"id": project_id}, update_data)
+    if not updated_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    response_cache.invalidate("projects")
+    search_index.index("projects", updated_project)
+    return write_response(Project, updated_project)
 
 @api_router.delete("/projects/{project_id}")
-async def delete_project(project_id: str):
-    result = await projects_collection.delete_one({"id": project_id})
-    if result.deleted_count == 0:
+async def delete_project(project_id: str, db: Storage = Depends(get_database)):
+    if not await db.projects.delete({"id": project_id}):
         raise HTTPException(status_code=404, detail="Project not found")
+    response_cache.invalidate("projects")
+    search_index.remove("projects", project_id)
     return {"message": "Project deleted successfully"}
 
 # Skills Endpoints
-@api_router.get("/skills", response_model=List[Skill])
-async def get_all_skills():
-    skills = []
-    async for skill in skills_collection.find().sort("category", 1):
-        skills.append(document_to_dict(skill))
-    return skills
+@api_router.get("/skills", response_model=list_response_model(Skill))
+async def get_all_skills(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    selected = select_fields(Skill, fields)
+    if limit is None and cursor is None:
+        return json_response(request, await skills_body(db, selected))
+    return json_response(request, await cached_page_body(
+        "skills", "all", Skill, db.skills, {}, SKILLS_KEYSET, cursor, limit, selected
+    ))
+
+@api_router.get("/skills/grouped", response_model=List[SkillGroup])
+async def get_grouped_skills(request: Request, db: Storage = Depends(get_database)):
+    """Skills grouped by category, with per-category counts and average level"""
+    return json_response(request, await skill_groups_body(db))
 
 @api_router.post("/skills", response_model=Skill)
-async def create_skill(skill: SkillCreate):
+async def create_skill(skill: SkillCreate, db: Storage = Depends(get_database)):
     skill_dict = skill.dict()
     skill_obj = Skill(**skill_dict)
-    result = await skills_collection.insert_one(skill_obj.dict())
-    created_skill = await skills_collection.find_one({"_id": result.inserted_id})
-    return document_to_dict(created_skill)
+    await db.skills.insert(skill_obj.dict())
+    response_cache.invalidate("skills")
+    search_index.index("skills", skill_obj.dict())
+    return write_response(Skill, skill_obj)
+
+@api_router.post("/skills/bulk", response_model=BulkWriteSummary)
+async def bulk_create_skills(
+    items: List[Any] = Body(...),
+    db: Storage = Depends(get_database),
+):
+    return await bulk_write_items("skills", db.skills, SkillCreate, Skill, items)
 
 @api_router.put("/skills/{skill_id}", response_model=Skill)
-async def update_skill(skill_id: str, skill: SkillUpdate):
-    existing_skill = await skills_collection.find_one({"id": skill_id})
-    if not existing_skill:
-        raise HTTPException(status_code=404, detail="Skill not found")
-    
+async def update_skill(
+    skill_id: str,
+    skill: SkillUpdate,
+    db: Storage = Depends(get_database),
+):
     update_data = {k: v for k, v in skill.dict().items() if v is not None}
     update_data["updatedAt"] = datetime.utcnow()
     
-    await skills_collection.update_one(
-        {"id": skill_id},
-        {"$set": update_data}
-    )
-    
-    updated_skill = await skills_collection.find_one({"id": skill_id})
-    return document_to_dict(updated_skill)
+    updated_skill = await db.skills.update({"id": skill_id}, update_data)
+    if not updated_skill:
+        raise HTTPException(status_code=404, detail="Skill not found")
+    response_cache.invalidate("skills")
+    search_index.index("skills", updated_skill)
+    return write_response(Skill, updated_skill)
 
 @api_router.delete("/skills/{skill_id}")
-async def delete_skill(skill_id: str):
-    result = await skills_collection.delete_one({"id": skill_id})
-    if result.deleted_count == 0:
+async def delete_skill(skill_id: str, db: Storage = Depends(get_database)):
+    if not await db.skills.delete({"id": skill_id}):
         raise HTTPException(status_code=404, detail="Skill not found")
+    response_cache.invalidate("skills")
+    search_index.remove("skills", skill_id)
     return {"message": "Skill deleted successfully"}
 
 # Education Endpoints
-@api_router.get("/education", response_model=List[Education])
-async def get_all_education():
-    educations = []
-    async for education in education_collection.find().sort("createdAt", -1):
-        educations.append(document_to_dict(education))
-    return educations
+@api_router.get("/education", response_model=list_response_model(Education))
+async def get_all_education(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    selected = select_fields(Education, fields)
+    if limit is None and cursor is None:
+        return json_response(request, await education_body(db, selected))
+    return json_response(request, await cached_page_body(
+        "education", "all", Education, db.education, {}, CREATED_AT_KEYSET, cursor, limit, selected
+    ))
 
 @api_router.post("/education", response_model=Education)
-async def create_education(education: EducationCreate):
+async def create_education(
+    education: EducationCreate,
+    db: Storage = Depends(get_database),
+):
     education_dict = education.dict()
     education_obj = Education(**education_dict)
-    result = await education_collection.insert_one(education_obj.dict())
-    created_education = await education_collection.find_one({"_id": result.inserted_id})
-    return document_to_dict(created_education)
+    await db.education.insert(education_obj.dict())
+    response_cache.invalidate("education")
+    return write_response(Education, education_obj)
+
+@api_router.post("/education/bulk", response_model=BulkWriteSummary)
+async def bulk_create_education(
+    items: List[Any] = Body(...),
+    db: Storage = Depends(get_database),
+):
+    return await bulk_write_items("education", db.education, EducationCreate, Education, items)
 
 # Achievement Endpoints
-@api_router.get("/achievements", response_model=List[Achievement])
-async def get_all_achievements():
-    achievements = []
-    async for achievement in achievements_collection.find().sort("year", -1):
-        achievements.append(document_to_dict(achievement))
-    return achievements
+@api_router.get("/achievements", response_model=list_response_model(Achievement))
+async def get_all_achievements(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    selected = select_fields(Achievement, fields)
+    if limit is None and cursor is None:
+        return json_response(request, await achievements_body(db, selected))
+    return json_response(request, await cached_page_body(
+        "achievements", "all", Achievement, db.achievements, {}, ACHIEVEMENTS_KEYSET, cursor, limit, selected
+    ))
 
 @api_router.post("/achievements", response_model=Achievement)
-async def create_achievement(achievement: AchievementCreate):
+async def create_achievement(
+    achievement: AchievementCreate,
+    db: Storage = Depends(get_database),
+):
     achievement_dict = achievement.dict()
     achievement_obj = Achievement(**achievement_dict)
-    result = await achievements_collection.insert_one(achievement_obj.dict())
-    created_achievement = await achievements_collection.find_one({"_id": result.inserted_id})
-    return document_to_dict(created_achievement)
+    await db.achievements.insert(achievement_obj.dict())
+    response_cache.invalidate("achievements")
+    return write_response(Achievement, achievement_obj)
+
+@api_router.post("/achievements/bulk", response_model=BulkWriteSummary)
+async def bulk_create_achievements(
+    items: List[Any] = Body(...),
+    db: Storage = Depends(get_database),
+):
+    return await bulk_write_items("achievements", db.achievements, AchievementCreate, Achievement, items)
+
+# Aggregate Endpoint
+@api_router.get("/portfolio", response_model=Portfolio, response_model_exclude_unset=True)
+async def get_portfolio(
+    request: Request,
+    include: Optional[str] = None,
+    db: Storage = Depends(get_database),
+):
+    """Fetch every (or the `include`d) portfolio section concurrently in one response"""
+    if include:
+        sections = list(dict.fromkeys(name.strip() for name in include.split(",") if name.strip()))
+        unknown = [name for name in sections if name not in PORTFOLIO_SECTIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown portfolio sections: {', '.join(unknown)}. "
+                       f"Valid sections: {', '.join(PORTFOLIO_SECTIONS)}"
+            )
+    else:
+        sections = list(PORTFOLIO_SECTIONS)
+
+    return json_response(request, await portfolio_body(db, sections))
+
+# Export Endpoint
+@api_router.get("/export", response_class=StreamingResponse)
+async def export_collections(
+    collections: Optional[str] = None,
+    format: str = "ndjson",
+    gzip: bool = False,
+    db: Storage = Depends(get_database),
+):
+    """Stream documents as NDJSON straight from the database cursors"""
+    if format != "ndjson":
+        raise HTTPException(status_code=400, detail="Unsupported export format; only 'ndjson' is available")
+    if collections:
+        names = list(dict.fromkeys(name.strip() for name in collections.split(",") if name.strip()))
+        unknown = [name for name in names if name not in COLLECTION_NAMES]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown collections: {', '.join(unknown)}. "
+                       f"Valid collections: {', '.join(COLLECTION_NAMES)}"
+            )
+    else:
+        names = list(COLLECTION_NAMES)
+
+    headers = {"Content-Disposition": 'attachment; filename="portfolio-export.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        ndjson_chunks(ndjson_lines(db, names, COLLECTION_MODELS), gzip=gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+# Search Endpoint
+@api_router.get("/search", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    collections: Optional[str] = None,
+):
+    """Ranked full-text search over projects, experience achievements and skill descriptions"""
+    names = None
+    if collections:
+        names = {name.strip() for name in collections.split(",") if name.strip()}
+        unknown = sorted(names - set(SEARCH_FIELDS))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown searchable collections: {', '.join(unknown)}. "
+                       f"Valid collections: {', '.join(SEARCH_FIELDS)}"
+            )
+    total, hits = search_index.search(q, limit=limit, collections=names)
+    return {"query": q, "total": total, "hits": hits}
+
+# Cache Endpoints
+@api_router.get("/cache/stats")
+async def get_cache_stats(request: Request):
+    stats = response_cache.stats()
+    stats["singleFlight"] = cache_fills.stats()
+    watcher = request.app.state.change_watcher
+    stats["changeStream"] = watcher.stats() if watcher is not None else None
+    return stats
+
+# Prometheus scrape endpoint, at the conventional path outside /api
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
 
 # Original test endpoint
 @api_router.get("/")
@@ -236,6 +789,11 @@ async def root():
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(CompressionMiddleware)
+
+# Inside CORS, so rejections still carry the CORS headers browsers need to read them
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -244,13 +802,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if PROFILING:
+    app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so latency includes every other middleware
+if METRICS:
+    app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    await close_database_connection()
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Static snapshot of the read API that nginx can serve without FastAPI or MongoDB.
+
+    python snapshot.py --out ../frontend/build/snapshot            # render once
+    python snapshot.py --out /srv/snapshot --watch 30              # re-render every 30s
+
+Every GET endpoint is rendered through the same cached-body functions the
+API uses and written as
+
+    v/<name>.<hash>.json(.gz|.br)       content-hashed, safe to cache forever
+    latest/<name>.json(.gz|.br)         stable alias of the current version
+    latest/manifest.json                endpoint -> current versioned path
+
+Rendering is incremental. With `--watch`, each poll only reads, for every
+collection, its document count and newest `updatedAt` (every write sets
+it), and re-renders just the endpoints built from collections whose pair
+changed; the first pass renders everything. An endpoint whose content hash
+matches the manifest is not rewritten or recompressed. Old versions
+beyond `--keep` are pruned so clients holding a slightly stale manifest
+still resolve.
+"""
+import argparse
+import asyncio
+import json
+import os
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from compression import brotli
+from database import COLLECTION_NAMES, open_storage
+import server
+
+# Snapshot file name -> (cached body renderer, collections it reads)
+ENDPOINTS = {
+    "personal-info": (server.personal_info_body, ("personal_info",)),
+    "experience": (server.experience_body, ("experience",)),
+    "projects": (server.projects_body, ("projects",)),
+    "projects-featured": (server.featured_projects_body, ("projects",)),
+    "skills": (server.skills_body, ("skills",)),
+    "skills-grouped": (server.skill_groups_body, ("skills",)),
+    "education": (server.education_body, ("education",)),
+    "achievements": (server.achievements_body, ("achievements",)),
+    "portfolio": (server.portfolio_body, COLLECTION_NAMES),
+}
+
+URL_PREFIX = "/snapshot"
+
+
+def write_atomic(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_variants(path, body):
+    """Write `path` plus its precompressed .gz and (if available) .br siblings"""
+    write_atomic(path, body)
+    compressor = zlib.compressobj(9, wbits=31)
+    write_atomic(path.with_name(path.name + ".gz"), compressor.compress(body) + compressor.flush())
+    if brotli is not None:
+        write_atomic(path.with_name(path.name + ".br"), brotli.compress(body, quality=11))
+
+
+def prune_versions(versions_dir, name, keep):
+    versions = sorted(
+        versions_dir.glob(f"{name}.*.json"),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for stale in versions[keep:]:
+        for variant in (stale, stale.with_name(stale.name + ".gz"), stale.with_name(stale.name + ".br")):
+            variant.unlink(missing_ok=True)
+
+
+async def collection_version(repository):
+    """(document count, newest updatedAt): inserts, updates and deletes all change it"""
+    newest = await repository.find({}, {"updatedAt": 1, "_id": 0}, sort=[("updatedAt", -1)], limit=1)
+    return await repository.count(), newest[0].get("updatedAt") if newest else None
+
+
+async def collection_versions(db):
+    versions = await asyncio.gather(*(collection_version(db.collection(name)) for name in COLLECTION_NAMES))
+    return dict(zip(COLLECTION_NAMES, versions))
+
+
+async def render_snapshot(db, out, keep=3, collections=None):
+    """Render into `out` the endpoints reading any of `collections` (all when None); returns the names that changed"""
+    versions_dir = out / "v"
+    latest_dir = out / "latest"
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    latest_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = latest_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {"endpoints": {}}
+
+    names = [
+        name for name, (_, sources) in ENDPOINTS.items()
+        if collections is None or any(source in collections for source in sources)
+    ]
+    # Each pass must see the database, not this process's response cache
+    server.response_cache.clear()
+    bodies = await asyncio.gather(*(ENDPOINTS[name][0](db) for name in names))
+
+    changed = []
+    for name, cached in zip(names, bodies):
+        if cached.body == b"null":
+            continue
+        digest = cached.etag.strip('"')[:16]
+        filename = f"{name}.{digest}.json"
+        entry = manifest["endpoints"].get(name)
+        if entry and entry["etag"] == cached.etag and (versions_dir / filename).exists():
+            continue
+
+        write_variants(versions_dir / filename, cached.body)
+        write_variants(latest_dir / f"{name}.json", cached.body)
+        prune_versions(versions_dir, name, keep)
+        manifest["endpoints"][name] = {
+            "path": f"{URL_PREFIX}/v/{filename}",
+            "etag": cached.etag,
+            "bytes": len(cached.body),
+            "lastModified": cached.last_modified.isoformat() if cached.last_modified else None,
+        }
+        changed.append(name)
+
+    if changed or not manifest_path.exists():
+        manifest["generatedAt"] = datetime.utcnow().isoformat()
+        write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+    return changed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Render the read API to static, precompressed JSON files")
+    parser.add_argument("--out", type=Path, required=True, help="snapshot directory served by nginx")
+    parser.add_argument("--keep", type=int, default=3, help="versions kept per endpoint")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep running, re-rendering the endpoints of changed collections every SECONDS")
+    args = parser.parse_args()
+
+    db = open_storage()
+    try:
+        versions = await collection_versions(db) if args.watch else None
+        changed = await render_snapshot(db, args.out, keep=args.keep)
+        while True:
+            stamp = datetime.now().strftime("%H:%M:%S")
+            print(f"📸 {stamp} {'updated: ' + ', '.join(changed) if changed else 'no changes'}")
+            if not args.watch:
+                break
+            await asyncio.sleep(args.watch)
+            latest = await collection_versions(db)
+            modified = {name for name in latest if latest[name] != versions[name]}
+            versions = latest
+            changed = await render_snapshot(db, args.out, keep=args.keep, collections=modified) if modified else []
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
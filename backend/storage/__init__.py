@@ -0,0 +1,10 @@
+"""
+Pluggable storage: one repository per portfolio collection, on MongoDB
+(Motor), in memory or in SQLite. `database.open_storage()` picks the engine
+from STORAGE_ENGINE.
+"""
+from storage.base import DuplicateKeyError, Insert, Upsert, Repository, Storage
+from storage.motor import MotorRepository
+from storage.memory import MemoryRepository, MemoryStorage
+from storage.sqlite import SQLiteRepository, SQLiteStorage
+
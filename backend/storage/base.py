@@ -0,0 +1,98 @@
+"""
+The repository interface every storage engine implements, one repository per collection.
+
+Queries, projections and sort specifications use MongoDB's syntax (the
+subset listed in `storage.documents`), so the same handler code runs on
+every engine. Engine-specific features such as aggregation pipelines,
+change streams and index management stay on the Motor collection, reachable
+as `repository.native` (None on the other engines); callers check for it
+and fall back to plain `find` reads.
+"""
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class DuplicateKeyError(Exception):
+    """A write would give two documents of one collection the same `id`"""
+
+
+class Insert(NamedTuple):
+    document: Dict[str, Any]
+
+
+class Upsert(NamedTuple):
+    """Set `values` on the first document matching `query`, or insert one with `on_insert` added"""
+    query: Dict[str, Any]
+    values: Dict[str, Any]
+    on_insert: Optional[Dict[str, Any]] = None
+
+
+class Repository:
+    """Reads and writes on one collection"""
+
+    native = None
+
+    def __init__(self, name):
+        self.name = name
+
+    async def find(self, query=None, projection=None, sort=None, limit=None):
+        """Matching documents as a list, ordered by `sort` ([(field, 1 | -1), ...])"""
+        raise NotImplementedError
+
+    async def find_one(self, query=None, projection=None):
+        documents = await self.find(query, projection, limit=1)
+        return documents[0] if documents else None
+
+    async def stream(self, query=None, projection=None, batch_size=None):
+        """Matching documents one at a time, for reads too large to hold at once"""
+        for document in await self.find(query, projection):
+            yield document
+
+    async def insert(self, document):
+        raise NotImplementedError
+
+    async def update(self, query, values):
+        """Set `values` on the first matching document; returns it as updated, or None"""
+        raise NotImplementedError
+
+    async def upsert(self, query, values, on_insert=None):
+        """`Upsert` one document; returns True when it was inserted"""
+        raise NotImplementedError
+
+    async def write_many(self, operations):
+        """Apply `Insert`/`Upsert` operations unordered, each independently of the others' failures
+
+        Returns {"inserted", "upserted", "matched", "modified"} counts plus
+        "created" (indexes of upserts that inserted) and "errors" ({index: message}).
+        """
+        raise NotImplementedError
+
+    async def delete(self, query):
+        """Delete the first matching document; returns whether there was one"""
+        raise NotImplementedError
+
+    async def count(self, query=None):
+        raise NotImplementedError
+
+    async def clear(self):
+        """Delete every document"""
+        raise NotImplementedError
+
+
+class Storage:
+    """The portfolio collections of one engine, as `storage.<collection name>` repositories"""
+
+    engine = None
+
+    def __init__(self, repositories):
+        self.names = tuple(repositories)
+        for name, repository in repositories.items():
+            setattr(self, name, repository)
+
+    def collection(self, name):
+        return getattr(self, name)
+
+    async def warm_up(self):
+        pass
+
+    def close(self):
+        pass
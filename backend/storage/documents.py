@@ -0,0 +1,322 @@
+"""
+MongoDB query semantics for engines that store plain documents.
+
+Supported, which covers every query the API issues:
+
+  * filters: equality (an array field matches if any element is equal),
+    `$eq`, `$ne`, `$in`, `$nin`, `$gt`, `$gte`, `$lt`, `$lte`, `$exists`,
+    `$and`, `$or`, `$nor`, and dotted paths into embedded documents;
+  * projections: inclusion (`{"title": 1, "_id": 0}`) or exclusion;
+  * sorts: any number of keys, ordered across types the way MongoDB
+    orders BSON types (null < numbers < strings < objects < arrays <
+    booleans < dates).
+
+Comparisons only match values of the same type class, as in MongoDB, and
+booleans never equal numbers. Anything else raises ValueError instead of
+silently matching differently from the Motor engine.
+
+`DocumentRepository` implements the repository interface on top of a few
+row primitives (scan, add, replace, remove), which the in-memory and
+SQLite engines provide.
+"""
+import operator
+from datetime import datetime
+from numbers import Number
+
+from storage.base import DuplicateKeyError, Insert, Repository
+
+MISSING = object()
+
+
+def get_path(document, path):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def same(a, b):
+    if isinstance(a, bool) != isinstance(b, bool):
+        return False
+    return a == b
+
+
+def equals(value, target):
+    if value is MISSING:
+        return target is None
+    if isinstance(value, list) and not isinstance(target, list):
+        return any(same(element, target) for element in value)
+    return same(value, target)
+
+
+def type_class(value):
+    if isinstance(value, bool):
+        return bool
+    if isinstance(value, Number):
+        return Number
+    return type(value)
+
+
+def compare(compare_values):
+    def match(value, operand):
+        if value is MISSING or value is None or operand is None:
+            return False
+        if isinstance(value, list):
+            return any(match(element, operand) for element in value)
+        return type_class(value) is type_class(operand) and compare_values(value, operand)
+    return match
+
+
+def match_in(value, operand):
+    return any(equals(value, target) for target in operand)
+
+
+OPERATORS = {
+    "$eq": equals,
+    "$ne": lambda value, operand: not equals(value, operand),
+    "$in": match_in,
+    "$nin": lambda value, operand: not match_in(value, operand),
+    "$gt": compare(operator.gt),
+    "$gte": compare(operator.ge),
+    "$lt": compare(operator.lt),
+    "$lte": compare(operator.le),
+    "$exists": lambda value, operand: (value is not MISSING) == bool(operand),
+}
+
+
+def is_operator_expression(condition):
+    return isinstance(condition, dict) and bool(condition) and all(key.startswith("$") for key in condition)
+
+
+def match_condition(value, condition):
+    if not is_operator_expression(condition):
+        return equals(value, condition)
+    for name, operand in condition.items():
+        if name not in OPERATORS:
+            raise ValueError(f"Unsupported query operator: {name}")
+        if not OPERATORS[name](value, operand):
+            return False
+    return True
+
+
+def matches(document, query):
+    """Whether `document` matches the MongoDB filter `query`"""
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif field == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif field == "$nor":
+            if any(matches(document, clause) for clause in condition):
+                return False
+        elif field.startswith("$"):
+            raise ValueError(f"Unsupported query operator: {field}")
+        elif not match_condition(get_path(document, field), condition):
+            return False
+    return True
+
+
+# BSON type order for sorting mixed values
+TYPE_RANKS = {type(None): 1, Number: 2, str: 3, dict: 4, list: 5, bool: 8, datetime: 9}
+
+
+def sort_key(value):
+    if value is MISSING or value is None:
+        return (1,)
+    kind = type_class(value)
+    rank = TYPE_RANKS.get(kind)
+    if rank is None:
+        return (10, str(value))
+    if kind is dict:
+        return (rank, tuple((key, sort_key(item)) for key, item in value.items()))
+    if kind is list:
+        return (rank, tuple(sort_key(item) for item in value))
+    return (rank, value)
+
+
+def sort_documents(documents, sort):
+    """Sort in place on [(field, 1 | -1), ...]"""
+    directions = {direction for _, direction in sort}
+    if len(directions) == 1:
+        # One pass on a composite key, e.g. the keyset sorts (field, id) in one direction
+        fields = [field for field, _ in sort]
+        documents.sort(
+            key=lambda document: tuple(sort_key(get_path(document, field)) for field in fields),
+            reverse=directions == {-1},
+        )
+        return documents
+    # Otherwise one stable pass per key, least significant first
+    for field, direction in reversed(sort):
+        documents.sort(key=lambda document: sort_key(get_path(document, field)), reverse=direction == -1)
+    return documents
+
+
+CONTAINERS = (dict, list)
+
+
+def clone(value):
+    """Copy documents handed out, so callers never share state with the store"""
+    if type(value) is dict:
+        return {key: clone(item) if type(item) in CONTAINERS else item for key, item in value.items()}
+    if type(value) is list:
+        return [clone(item) if type(item) in CONTAINERS else item for item in value]
+    return value
+
+
+def to_stored(value):
+    """Copy a document being written, with datetimes cut to milliseconds as BSON stores them"""
+    if isinstance(value, dict):
+        return {key: to_stored(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_stored(item) for item in value]
+    if isinstance(value, datetime):
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def project(document, projection):
+    if not projection:
+        return clone(document)
+    included = [field for field, flag in projection.items() if flag and field != "_id"]
+    if included:
+        return {field: clone(document[field]) for field in included if field in document}
+    excluded = {field for field, flag in projection.items() if not flag}
+    return {field: clone(value) for field, value in document.items() if field not in excluded}
+
+
+def id_lookup(query):
+    """The `id`s a query is restricted to at its top level, or None when it may match any"""
+    if not query:
+        return None
+    condition = query.get("id")
+    if isinstance(condition, str):
+        return [condition]
+    if isinstance(condition, dict) and set(condition) == {"$in"}:
+        return [value for value in condition["$in"] if isinstance(value, str)]
+    return None
+
+
+def upsert_document(query, values, on_insert):
+    """The document an upsert inserts: the query's equality fields, then `values` and `on_insert`"""
+    document = {
+        field: condition for field, condition in query.items()
+        if not field.startswith("$") and "." not in field and not is_operator_expression(condition)
+    }
+    document.update(values)
+    document.update(on_insert or {})
+    return to_stored(document)
+
+
+class DocumentRepository(Repository):
+    """The repository interface over row primitives; subclasses provide them and `_call`
+
+    Primitives (synchronous): `_rows(ids)` yields (key, document) pairs, for
+    the given `id`s or for all rows in insertion order when `ids` is None;
+    `_add(document)`, `_replace(key, document)`, `_remove(key)`,
+    `_remove_all()` and `_size()`.
+    """
+
+    async def _call(self, function, *args):
+        raise NotImplementedError
+
+    def _matching(self, query):
+        query = query or {}
+        for key, document in self._rows(id_lookup(query)):
+            if matches(document, query):
+                yield key, document
+
+    def _find(self, query, projection, sort, limit):
+        if sort:
+            documents = sort_documents([document for _, document in self._matching(query)], sort)
+            if limit:
+                documents = documents[:limit]
+        else:
+            documents = []
+            for _, document in self._matching(query):
+                documents.append(document)
+                if limit and len(documents) >= limit:
+                    break
+        return [project(document, projection) for document in documents]
+
+    def _first(self, query):
+        return next(self._matching(query), (None, None))
+
+    def _update(self, query, values):
+        key, document = self._first(query)
+        if document is None:
+            return None
+        updated = {**document, **to_stored(values)}
+        self._replace(key, updated)
+        return clone(updated)
+
+    def _upsert(self, query, values, on_insert):
+        """'created', 'modified' or 'matched' (found, but already holding `values`)"""
+        key, document = self._first(query)
+        if document is None:
+            self._add(upsert_document(query, values, on_insert))
+            return "created"
+        values = to_stored(values)
+        if all(field in document and same(document[field], value) for field, value in values.items()):
+            return "matched"
+        self._replace(key, {**document, **values})
+        return "modified"
+
+    def _write_many(self, operations):
+        result = {"inserted": 0, "upserted": 0, "matched": 0, "modified": 0, "created": [], "errors": {}}
+        for index, operation in enumerate(operations):
+            try:
+                if isinstance(operation, Insert):
+                    self._add(to_stored(operation.document))
+                    result["inserted"] += 1
+                    continue
+                outcome = self._upsert(*operation)
+            except DuplicateKeyError as e:
+                result["errors"][index] = str(e)
+                continue
+            if outcome == "created":
+                result["upserted"] += 1
+                result["created"].append(index)
+            else:
+                result["matched"] += 1
+                result["modified"] += outcome == "modified"
+        return result
+
+    def _delete(self, query):
+        key, document = self._first(query)
+        if document is None:
+            return False
+        self._remove(key)
+        return True
+
+    def _count(self, query):
+        if not query:
+            return self._size()
+        return sum(1 for _ in self._matching(query))
+
+    async def find(self, query=None, projection=None, sort=None, limit=None):
+        return await self._call(self._find, query, projection, sort, limit)
+
+    async def insert(self, document):
+        await self._call(self._add, to_stored(document))
+
+    async def update(self, query, values):
+        return await self._call(self._update, query, values)
+
+    async def upsert(self, query, values, on_insert=None):
+        return await self._call(self._upsert, query, values, on_insert) == "created"
+
+    async def write_many(self, operations):
+        return await self._call(self._write_many, list(operations))
+
+    async def delete(self, query):
+        return await self._call(self._delete, query)
+
+    async def count(self, query=None):
+        return await self._call(self._count, query)
+
+    async def clear(self):
+        await self._call(self._remove_all)
@@ -0,0 +1,67 @@
+"""
+In-memory storage engine: documents in dicts, gone when the process exits.
+
+Meant for tests, demos and single-worker deployments where the portfolio
+content is seeded at startup; every uvicorn worker gets its own copy.
+Lookups by `id` are dict hits, everything else is a scan.
+"""
+from itertools import count
+
+from storage.base import DuplicateKeyError, Storage
+from storage.documents import DocumentRepository
+
+
+class MemoryRepository(DocumentRepository):
+    def __init__(self, name):
+        super().__init__(name)
+        self._documents = {}  # row key -> document, in insertion order
+        self._keys = {}  # id -> row key
+        self._next_key = count()
+
+    async def _call(self, function, *args):
+        # Every operation runs to completion without awaiting, so it is atomic
+        return function(*args)
+
+    def _rows(self, ids):
+        if ids is None:
+            return self._documents.items()
+        keys = (self._keys.get(document_id) for document_id in dict.fromkeys(ids))
+        return sorted((key, self._documents[key]) for key in keys if key is not None)
+
+    def _add(self, document):
+        document_id = document.get("id")
+        if document_id is not None and document_id in self._keys:
+            raise DuplicateKeyError(f"{self.name}: duplicate id {document_id!r}")
+        key = next(self._next_key)
+        self._documents[key] = document
+        if document_id is not None:
+            self._keys[document_id] = key
+
+    def _replace(self, key, document):
+        previous_id = self._documents[key].get("id")
+        document_id = document.get("id")
+        if document_id != previous_id:
+            if document_id is not None and document_id in self._keys:
+                raise DuplicateKeyError(f"{self.name}: duplicate id {document_id!r}")
+            self._keys.pop(previous_id, None)
+            if document_id is not None:
+                self._keys[document_id] = key
+        self._documents[key] = document
+
+    def _remove(self, key):
+        document = self._documents.pop(key)
+        self._keys.pop(document.get("id"), None)
+
+    def _remove_all(self):
+        self._documents.clear()
+        self._keys.clear()
+
+    def _size(self):
+        return len(self._documents)
+
+
+class MemoryStorage(Storage):
+    engine = "memory"
+
+    def __init__(self, collection_names):
+        super().__init__({name: MemoryRepository(name) for name in collection_names})
@@ -0,0 +1,96 @@
+"""
+MongoDB storage engine: repositories over Motor collections.
+
+Each call is a single round trip (`find_one_and_update` for updates, one
+unordered `bulk_write` for batches), and the collection stays reachable as
+`repository.native` for aggregation pipelines and change streams.
+"""
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError as MongoDuplicateKeyError
+
+from storage.base import DuplicateKeyError, Insert, Repository
+
+
+def update_spec(values, on_insert):
+    spec = {"$set": values}
+    if on_insert:
+        spec["$setOnInsert"] = on_insert
+    return spec
+
+
+class MotorRepository(Repository):
+    def __init__(self, collection):
+        super().__init__(collection.name)
+        self.native = collection
+
+    def _cursor(self, query, projection, sort, limit):
+        cursor = self.native.find(query or {}, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    async def find(self, query=None, projection=None, sort=None, limit=None):
+        return await self._cursor(query, projection, sort, limit).to_list(limit or None)
+
+    async def find_one(self, query=None, projection=None):
+        return await self.native.find_one(query or {}, projection)
+
+    async def stream(self, query=None, projection=None, batch_size=None):
+        cursor = self._cursor(query, projection, None, None)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        async for document in cursor:
+            yield document
+
+    async def insert(self, document):
+        try:
+            await self.native.insert_one(document)
+        except MongoDuplicateKeyError as e:
+            raise DuplicateKeyError(f"{self.name}: duplicate id {document.get('id')!r}") from e
+
+    async def update(self, query, values):
+        return await self.native.find_one_and_update(
+            query, {"$set": values}, return_document=ReturnDocument.AFTER
+        )
+
+    async def upsert(self, query, values, on_insert=None):
+        try:
+            result = await self.native.update_one(query, update_spec(values, on_insert), upsert=True)
+        except MongoDuplicateKeyError as e:
+            raise DuplicateKeyError(f"{self.name}: {e}") from e
+        return result.upserted_id is not None
+
+    async def write_many(self, operations):
+        requests = [
+            InsertOne(operation.document) if isinstance(operation, Insert)
+            else UpdateOne(operation.query, update_spec(operation.values, operation.on_insert), upsert=True)
+            for operation in operations
+        ]
+        if not requests:
+            return {"inserted": 0, "upserted": 0, "matched": 0, "modified": 0, "created": [], "errors": {}}
+        try:
+            details = (await self.native.bulk_write(requests, ordered=False)).bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+        return {
+            "inserted": details.get("nInserted", 0),
+            "upserted": details.get("nUpserted", 0),
+            "matched": details.get("nMatched", 0),
+            "modified": details.get("nModified", 0),
+            "created": [upserted["index"] for upserted in details.get("upserted", [])],
+            "errors": {
+                error["index"]: error.get("errmsg", "write failed") for error in details.get("writeErrors", [])
+            },
+        }
+
+    async def delete(self, query):
+        result = await self.native.delete_one(query)
+        return result.deleted_count > 0
+
+    async def count(self, query=None):
+        return await self.native.count_documents(query or {})
+
+    async def clear(self):
+        await self.native.delete_many({})
@@ -0,0 +1,171 @@
+"""
+SQLite storage engine: one table per collection, documents stored as JSON.
+
+Each table keeps the document `id` in its own UNIQUE column, which
+enforces uniqueness. Filters and sorts use the shared MongoDB query
+semantics over decoded documents, which each repository keeps in memory
+once read: its own writes update them, and they are dropped whenever
+`PRAGMA data_version` shows that another connection (another worker or
+process sharing the file) has committed. Decoding, not SQLite, is what a
+read would otherwise spend its time on, and a portfolio's few hundred
+documents fit in memory many times over.
+
+The connection is used from a single worker thread, which serializes the
+statements and keeps blocking file I/O off the event loop; every
+repository call runs in one transaction. Datetimes are stored as
+`{"$date": "<ISO 8601>"}` so they come back as datetimes.
+
+    STORAGE_ENGINE=sqlite SQLITE_PATH=portfolio.sqlite3 uvicorn server:app
+"""
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from storage.base import DuplicateKeyError, Storage
+from storage.documents import DocumentRepository
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat(timespec="microseconds")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_object(obj):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def dumps(document):
+    return json.dumps(document, default=encode_value, separators=(",", ":"))
+
+
+def loads(body):
+    return json.loads(body, object_hook=decode_object)
+
+
+class SQLiteRepository(DocumentRepository):
+    def __init__(self, name, storage):
+        super().__init__(name)
+        self.storage = storage
+        self.table = f'"{name}"'
+        self._cache = None  # row key -> decoded document, once loaded
+        self._keys = {}  # id -> row key, while the cache is loaded
+
+    @property
+    def connection(self):
+        return self.storage.connection
+
+    async def _call(self, function, *args):
+        return await self.storage.run(function, *args)
+
+    def forget(self):
+        self._cache = None
+        self._keys = {}
+
+    def _load(self):
+        if self._cache is None:
+            cursor = self.connection.execute(f"SELECT key, body FROM {self.table} ORDER BY key")
+            self._cache = {key: loads(body) for key, body in cursor}
+            self._keys = {
+                document["id"]: key for key, document in self._cache.items() if document.get("id") is not None
+            }
+        return self._cache
+
+    def _rows(self, ids):
+        rows = self._load()
+        if ids is None:
+            return rows.items()
+        keys = (self._keys.get(document_id) for document_id in dict.fromkeys(ids))
+        return sorted((key, rows[key]) for key in keys if key is not None)
+
+    def _add(self, document):
+        try:
+            cursor = self.connection.execute(
+                f"INSERT INTO {self.table} (id, body) VALUES (?, ?)", (document.get("id"), dumps(document))
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"{self.name}: duplicate id {document.get('id')!r}") from e
+        if self._cache is not None:
+            self._cache[cursor.lastrowid] = document
+            if document.get("id") is not None:
+                self._keys[document["id"]] = cursor.lastrowid
+
+    def _replace(self, key, document):
+        try:
+            self.connection.execute(
+                f"UPDATE {self.table} SET id = ?, body = ? WHERE key = ?", (document.get("id"), dumps(document), key)
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"{self.name}: duplicate id {document.get('id')!r}") from e
+        if self._cache is not None:
+            self._keys.pop(self._cache[key].get("id"), None)
+            self._cache[key] = document
+            if document.get("id") is not None:
+                self._keys[document["id"]] = key
+
+    def _remove(self, key):
+        self.connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        if self._cache is not None:
+            self._keys.pop(self._cache.pop(key).get("id"), None)
+
+    def _remove_all(self):
+        self.connection.execute(f"DELETE FROM {self.table}")
+        if self._cache is not None:
+            self._cache.clear()
+            self._keys.clear()
+
+    def _size(self):
+        if self._cache is not None:
+            return len(self._cache)
+        (size,) = self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return size
+
+
+class SQLiteStorage(Storage):
+    engine = "sqlite"
+
+    def __init__(self, path, collection_names):
+        self.path = str(path)
+        self._data_version = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            for name in collection_names:
+                self.connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" '
+                    "(key INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE, body TEXT NOT NULL)"
+                )
+        super().__init__({name: SQLiteRepository(name, self) for name in collection_names})
+
+    def _forget(self):
+        for name in self.names:
+            self.collection(name).forget()
+
+    def _transaction(self, function, *args):
+        # data_version changes when another connection (e.g. another worker) commits
+        (version,) = self.connection.execute("PRAGMA data_version").fetchone()
+        if version != self._data_version:
+            self._data_version = version
+            self._forget()
+        try:
+            with self.connection:
+                return function(*args)
+        except Exception:
+            self._forget()  # the transaction was rolled back, but cached rows may have been updated
+            raise
+
+    async def run(self, function, *args):
+        """Run `function(*args)` in one transaction on the connection's thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._transaction, function, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.connection.close()
@@ -16,16 +16,9 @@ const Skills = () => {
   const fetchSkills = async () => {
     try {
       setLoading(true);
-      const skillsArray = await skillsApi.getAll();
-      
-      // Transform skills data to grouped format
-      const grouped = {};
-      skillsArray.forEach(skill => {
-        if (!grouped[skill.category]) {
-          grouped[skill.category] = [];
-        }
-        grouped[skill.category].push(skill);
-      });
+      const groups = await skillsApi.getGrouped();
+      const grouped = Object.fromEntries(groups.map(group => [group.category, group.skills]));
+      const skillsArray = groups.flatMap(group => group.skills);
       
       setSkillsData(grouped);
       
@@ -132,7 +132,39 @@ export const projectsApi = {
     const response = await api.get('/projects/featured');
     return response.data;
   },
-  
+
+  // filters: { category: [...], status: [...], type: [...], technologies: [...], isFeatured: bool }
+  filter: async (filters = {}, { limit, cursor } = {}) => {
+    if (isProductionFrontendOnly) {
+      // Filter mock projects and count facets locally for frontend-only deployment
+      const all = [...projects.featured, ...projects.upcoming];
+      const facetFields = ['category', 'status', 'type', 'technologies', 'isFeatured'];
+      const matches = (project, exclude) => facetFields.every((field) => {
+        const wanted = filters[field];
+        if (field === exclude || wanted === undefined || wanted === null || wanted.length === 0) return true;
+        const values = [].concat(wanted).map(String);
+        return [].concat(project[field] ?? []).some((value) => values.includes(String(value)));
+      });
+      const facets = Object.fromEntries(facetFields.map((field) => {
+        const counts = {};
+        all.filter((project) => matches(project, field)).forEach((project) => {
+          [].concat(project[field] ?? []).forEach((value) => {
+            counts[String(value)] = (counts[String(value)] || 0) + 1;
+          });
+        });
+        return [field, counts];
+      }));
+      return new Promise((resolve) => {
+        setTimeout(() => resolve({ items: all.filter((project) => matches(project)), nextCursor: null, facets }), 120);
+      });
+    }
+    const response = await api.get('/projects/filter', {
+      params: { ...filters, limit, cursor },
+      paramsSerializer: { indexes: null }
+    });
+    return response.data;
+  },
+
   create: async (data) => {
     if (isProductionFrontendOnly) {
       // Return created project for frontend-only deployment
@@ -188,6 +220,27 @@ export const skillsApi = {
     const response = await api.get('/skills');
     return response.data;
   },
+
+  // [{ category, count, averageLevel, skills: [...] }], grouped by the server
+  getGrouped: async () => {
+    if (isProductionFrontendOnly) {
+      // Group mock skills the way the backend does for frontend-only deployment
+      const groups = Object.entries(skills)
+        .map(([category, skillList]) => ({
+          category,
+          count: skillList.length,
+          averageLevel: Math.round(
+            (skillList.reduce((sum, skill) => sum + skill.level, 0) / skillList.length) * 10
+          ) / 10,
+          skills: skillList
+        }));
+      return new Promise((resolve) => {
+        setTimeout(() => resolve(groups), 130);
+      });
+    }
+    const response = await api.get('/skills/grouped');
+    return response.data;
+  },
   
   create: async (data) => {
     if (isProductionFrontendOnly) {
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def api(monkeypatch):
+    """An HTTP client for the app, running on a freshly seeded in-memory store"""
+    import database
+    import server
+    monkeypatch.setattr(database, "STORAGE_ENGINE", "memory")
+    server.response_cache.clear()
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
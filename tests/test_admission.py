@@ -0,0 +1,174 @@
+"""
+Admission control: token buckets, the concurrency queue and client identification.
+"""
+import asyncio
+
+import pytest
+
+from admission import (
+    ADMITTED, QUEUE_FULL, QUEUE_TIMEOUT, QUEUED, RATE_LIMITED,
+    AdmissionControl, AdmissionMiddleware, ConcurrencyLimit, TokenBuckets,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def scope(*forwarded, client=("10.0.0.1", 5000), api_key=None):
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    if api_key is not None:
+        headers.append((b"x-api-key", api_key.encode()))
+    return {"type": "http", "path": "/api/projects", "headers": headers, "client": client}
+
+
+def test_burst_then_refill():
+    clock = FakeClock()
+    buckets = TokenBuckets(rate=2, burst=3, max_clients=10, clock=clock)
+    assert [buckets.take("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take("a") == pytest.approx(0.5)
+    assert buckets.take("b") == 0.0  # other clients have their own bucket
+
+    clock.now += 0.5
+    assert buckets.take("a") == 0.0
+    assert buckets.take("a") > 0
+    clock.now += 60
+    assert [buckets.take("a") for _ in range(3)] == [0.0, 0.0, 0.0]  # refills up to the burst only
+    assert buckets.take("a") > 0
+
+
+def test_least_recently_seen_client_is_evicted():
+    buckets = TokenBuckets(rate=1, burst=1, max_clients=2, clock=FakeClock())
+    buckets.take("a")
+    buckets.take("b")
+    buckets.take("a")  # a is now the most recent
+    buckets.take("c")
+    assert len(buckets) == 2 and buckets.evictions == 1
+    assert buckets.take("a") > 0  # a kept its (empty) bucket
+    assert buckets.take("b") == 0.0  # b was evicted and starts full
+
+
+@pytest.mark.parametrize("trusted_hops, headers, expected", [
+    (0, ("1.1.1.1",), "ip:10.0.0.1"),  # not behind a proxy: the header is ignored
+    (1, ("1.1.1.1, 203.0.113.7",), "ip:203.0.113.7"),  # the proxy appended the real address
+    (1, ("9.9.9.9, 8.8.8.8, 203.0.113.7",), "ip:203.0.113.7"),  # spoofed entries on the left are ignored
+    (1, ("spoof", "203.0.113.7"), "ip:203.0.113.7"),  # repeated headers are one list
+    (2, ("spoof, 203.0.113.7, 10.1.1.1",), "ip:203.0.113.7"),
+    (2, ("10.1.1.1",), "ip:10.0.0.1"),  # fewer entries than hops: the socket address
+    (1, (), "ip:10.0.0.1"),
+])
+def test_client_address(trusted_hops, headers, expected):
+    assert AdmissionControl(rate=1, trusted_hops=trusted_hops).client(scope(*headers)) == expected
+
+
+def test_spoofed_forwarded_for_cannot_dodge_the_limit():
+    control = AdmissionControl(rate=1, burst=2, trusted_hops=1)
+    clients = {control.client(scope(f"{n}.{n}.{n}.{n}, 203.0.113.7")) for n in range(10)}
+    assert clients == {"ip:203.0.113.7"}
+
+
+def test_only_known_api_keys_get_their_own_bucket():
+    control = AdmissionControl(rate=1, api_keys=frozenset({"k1"}))
+    assert control.client(scope(api_key="k1")) == "key:k1"
+    assert control.client(scope(api_key="made-up")) == "ip:10.0.0.1"
+
+
+@pytest.mark.anyio
+async def test_released_slot_goes_to_the_oldest_waiter():
+    limit = ConcurrencyLimit(limit=1, max_queued=2, timeout=5)
+    assert await limit.acquire() == ADMITTED
+    first = asyncio.ensure_future(limit.acquire())
+    second = asyncio.ensure_future(limit.acquire())
+    await asyncio.sleep(0)
+    assert limit.queued == 2
+    assert await limit.acquire() == QUEUE_FULL
+
+    limit.release()
+    assert await first == QUEUED
+    assert not second.done() and limit.active == 1
+    limit.release()
+    assert await second == QUEUED
+    limit.release()
+    assert (limit.active, limit.queued) == (0, 0)
+
+
+@pytest.mark.anyio
+async def test_queue_timeout():
+    limit = ConcurrencyLimit(limit=1, max_queued=1, timeout=0.01)
+    await limit.acquire()
+    assert await limit.acquire() == QUEUE_TIMEOUT
+    assert limit.queued == 0
+    limit.release()
+    assert limit.active == 0
+    assert await limit.acquire() == ADMITTED
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    limit = ConcurrencyLimit(limit=1, max_queued=2, timeout=5)
+    await limit.acquire()
+    waiting = asyncio.ensure_future(limit.acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert limit.queued == 0
+    limit.release()
+    assert limit.active == 0
+
+
+@pytest.mark.anyio
+async def test_waiter_cancelled_after_being_handed_a_slot_gives_it_back():
+    limit = ConcurrencyLimit(limit=1, max_queued=2, timeout=5)
+    await limit.acquire()
+    waiting = asyncio.ensure_future(limit.acquire())
+    await asyncio.sleep(0)
+    limit.release()  # hands the slot over, but the waiter has not resumed yet
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert (limit.active, limit.queued) == (0, 0)
+
+
+async def call(app, request_scope):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(request_scope, receive, send)
+    start = sent[0]
+    return start["status"], dict(start["headers"])
+
+
+@pytest.mark.anyio
+async def test_middleware_answers_429_and_503():
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    control = AdmissionControl(rate=1, burst=2, max_concurrent=1, max_queued=0, queue_timeout_ms=10)
+    middleware = AdmissionMiddleware(app, control)
+    holder = asyncio.ensure_future(call(middleware, scope(client=("1.1.1.1", 1))))
+    await asyncio.sleep(0)
+
+    status, headers = await call(middleware, scope(client=("2.2.2.2", 1)))
+    assert status == 503 and headers[b"retry-after"] == b"1"
+    release.set()
+    assert (await holder)[0] == 200
+
+    assert (await call(middleware, scope(client=("1.1.1.1", 1))))[0] == 200
+    status, headers = await call(middleware, scope(client=("1.1.1.1", 1)))
+    assert status == 429 and int(headers[b"retry-after"]) >= 1
+    assert control.decisions[RATE_LIMITED] == 1 and control.decisions[QUEUE_FULL] == 1
+    assert control.stats()["active"] == 0
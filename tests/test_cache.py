@@ -0,0 +1,228 @@
+"""
+Response cache: TTL/LRU buckets, stale-while-revalidate and single-flight fills.
+"""
+import asyncio
+
+import pytest
+
+from typing import Any, List
+
+import server
+from cache import ResponseCache, SingleFlight, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl=10, max_entries=4, clock=clock)
+    cache.set("k", "v")
+    clock.now += 9.9
+    assert cache.get("k") == "v"
+    clock.now += 0.1
+    assert cache.get("k") is None
+    assert len(cache) == 0 and cache.expirations == 1
+
+
+def test_least_recently_used_entry_is_evicted_at_capacity(clock):
+    cache = TTLCache(ttl=10, max_entries=2, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.evictions == 1
+
+
+def test_invalidation_drops_only_that_collection(clock):
+    cache = ResponseCache(ttl=10, max_entries=4, clock=clock)
+    cache.set("skills", "all", "s")
+    cache.set("projects", "all", "p")
+    cache.invalidate("skills")
+    assert cache.get("skills", "all") is None and cache.get("projects", "all") == "p"
+    assert cache.generation("skills") == 1 and cache.generation("projects") == 0
+    assert cache.last_write("skills") is not None
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(monkeypatch, clock):
+    """server's response cache and fill coalescing, swapped for fresh ones on a fake clock"""
+    cache = ResponseCache(ttl=10, max_entries=8, max_stale=30, clock=clock)
+    monkeypatch.setattr(server, "response_cache", cache)
+    monkeypatch.setattr(server, "cache_fills", SingleFlight())
+    return cache
+
+
+def read(load):
+    return server.cached_json_body("skills", "all", List[Any], load)
+
+
+class Loader:
+    """A load() that blocks until released and counts its executions"""
+
+    def __init__(self, result="body", error=None, blocked=True):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_load():
+    flights, load = SingleFlight(), Loader()
+    waiters = [asyncio.ensure_future(flights.run("skills", "k", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flights.stats()["collections"]["skills"]["inFlight"] == 1
+    load.release.set()
+    assert await asyncio.gather(*waiters) == ["body"] * 5
+    assert load.calls == 1
+    assert flights.stats()["collections"]["skills"] == {"leaders": 1, "coalesced": 4, "refreshes": 0, "inFlight": 0}
+
+    # Finished flights are forgotten, so the next miss loads again
+    assert await flights.run("skills", "k", Loader(result="again", blocked=False)) == "again"
+
+
+@pytest.mark.anyio
+async def test_different_keys_load_separately():
+    flights, first, second = SingleFlight(), Loader("a"), Loader("b")
+    waiters = [asyncio.ensure_future(flights.run("skills", "k1", first)),
+               asyncio.ensure_future(flights.run("skills", "k2", second))]
+    await asyncio.sleep(0)
+    first.release.set()
+    second.release.set()
+    assert await asyncio.gather(*waiters) == ["a", "b"]
+    assert flights.stats()["totals"]["leaders"] == 2
+
+
+@pytest.mark.anyio
+async def test_load_error_reaches_every_waiter():
+    flights, load = SingleFlight(), Loader(error=RuntimeError("mongo down"))
+    waiters = [asyncio.ensure_future(flights.run("skills", "k", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    load.release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert load.calls == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == "mongo down" for result in results)
+    assert flights.stats()["totals"]["inFlight"] == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_the_load():
+    flights, load = SingleFlight(), Loader()
+    leader = asyncio.ensure_future(flights.run("skills", "k", load))
+    follower = asyncio.ensure_future(flights.run("skills", "k", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    load.release.set()
+    assert await follower == "body"
+    assert load.calls == 1
+
+
+@pytest.mark.anyio
+async def test_load_finishes_after_every_waiter_is_gone():
+    flights, load = SingleFlight(), Loader()
+    waiter = asyncio.ensure_future(flights.run("skills", "k", load))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    assert flights.stats()["totals"]["inFlight"] == 1
+    load.release.set()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert flights.stats()["totals"]["inFlight"] == 0
+
+
+@pytest.mark.anyio
+async def test_stale_entry_is_served_while_one_refresh_runs(cache, clock):
+    assert (await read(Loader(["v1"], blocked=False))).body == b'["v1"]'
+    clock.now += 15  # past the ttl, within max_stale
+
+    refresh = Loader(["v2"])
+    stale = [await read(refresh) for _ in range(3)]
+    assert [cached.body for cached in stale] == [b'["v1"]'] * 3
+    await asyncio.sleep(0)
+    assert refresh.calls == 1
+    assert server.cache_fills.stats()["totals"]["refreshes"] == 1
+    assert cache.stats()["totals"]["staleHits"] == 3
+
+    refresh.release.set()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    cached, fresh = cache.lookup("skills", "all")
+    assert fresh and cached.body == b'["v2"]'
+
+
+@pytest.mark.anyio
+async def test_entry_past_max_stale_is_a_miss(cache, clock):
+    await read(Loader(["v1"], blocked=False))
+    clock.now += 10 + 30
+    load = Loader(["v2"], blocked=False)
+    assert (await read(load)).body == b'["v2"]'
+    assert load.calls == 1
+    assert server.cache_fills.stats()["totals"]["refreshes"] == 0
+    assert cache.stats()["totals"]["expirations"] == 1
+
+
+@pytest.mark.anyio
+async def test_refresh_finishing_after_a_write_is_not_cached(cache, clock):
+    await read(Loader(["v1"], blocked=False))
+    clock.now += 15
+    refresh = Loader(["before the write"])
+    await read(refresh)
+    await asyncio.sleep(0)
+
+    cache.invalidate("skills")
+    refresh.release.set()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert cache.lookup("skills", "all") == (None, False)
+
+    after = Loader(["after the write"], blocked=False)
+    assert (await read(after)).body == b'["after the write"]'
+
+
+@pytest.mark.anyio
+async def test_skill_writes_invalidate_the_cached_list(api):
+    def names(response):
+        return sorted(skill["name"] for skill in response.json())
+
+    before = names(await api.get("/api/skills"))
+    await api.get("/api/projects")
+    assert server.response_cache.get("skills", "all") is not None
+
+    created = await api.post("/api/skills", json={
+        "category": "Languages", "name": "Zig", "level": 40, "description": "Comptime",
+    })
+    assert created.status_code == 200
+    assert server.response_cache.get("skills", "all") is None
+    assert server.response_cache.get("projects", "all") is not None  # other collections keep their entries
+    assert names(await api.get("/api/skills")) == sorted(before + ["Zig"])
+
+    skill_id = created.json()["id"]
+    assert (await api.put(f"/api/skills/{skill_id}", json={"name": "Odin"})).status_code == 200
+    assert names(await api.get("/api/skills")) == sorted(before + ["Odin"])
+
+    assert (await api.delete(f"/api/skills/{skill_id}")).status_code == 200
+    assert names(await api.get("/api/skills")) == before
+    assert server.response_cache.generation("skills") >= 3
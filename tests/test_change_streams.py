@@ -0,0 +1,132 @@
+"""
+Change-stream watcher: consumer slots, resume-token persistence and invalidation.
+
+Slot leasing runs on STORAGE_TEST_MONGO_URL or on mongomock-motor. Tailing
+needs a replica set, so those tests only run when STORAGE_TEST_MONGO_URL
+points at one, e.g.
+
+    STORAGE_TEST_MONGO_URL='mongodb://localhost:27017/?replicaSet=rs0&directConnection=true' pytest tests/
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from cache import ResponseCache
+from changes import ChangeWatcher, TOKENS_COLLECTION
+from database import PortfolioDatabase
+from search import SearchIndex
+
+pytestmark = pytest.mark.anyio
+
+MONGO_URL = os.environ.get("STORAGE_TEST_MONGO_URL")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    if MONGO_URL:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(MONGO_URL)
+    else:
+        mongomock_motor = pytest.importorskip("mongomock_motor")
+        client = mongomock_motor.AsyncMongoMockClient()
+    name = f"change_streams_{uuid.uuid4().hex[:8]}"
+    db = PortfolioDatabase(client, name)
+    yield db
+    await client.drop_database(name)
+    db.close()
+
+
+@pytest.fixture
+async def replica_set(db):
+    if not MONGO_URL or not await ChangeWatcher(db, consumer="probe").supported():
+        pytest.skip("needs STORAGE_TEST_MONGO_URL pointing at a replica set")
+    return db
+
+
+def watcher(db, **options):
+    return ChangeWatcher(db, cache=ResponseCache(ttl=60, max_entries=16), index=SearchIndex(),
+                         flush_seconds=0, host="test-host", **options)
+
+
+async def wait_for(condition, timeout=10):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("timed out waiting for the watcher")
+        await asyncio.sleep(0.05)
+
+
+async def test_processes_on_one_host_get_their_own_slot(db):
+    first, second = watcher(db), watcher(db)
+    await first.load_token()
+    await second.load_token()
+    assert (first.consumer, second.consumer) == ("test-host-0", "test-host-1")
+
+
+async def test_released_slot_and_token_are_taken_over(db):
+    first, second = watcher(db), watcher(db)
+    await first.load_token()
+    await second.load_token()
+    first.token = {"_data": "checkpoint"}
+    await first.stop()
+
+    restarted = watcher(db)
+    assert await restarted.load_token() == {"_data": "checkpoint"}
+    assert restarted.consumer == "test-host-0"
+
+
+async def test_lost_lease_moves_to_a_free_slot(db):
+    holder = watcher(db)
+    await holder.load_token()
+    await db.database[TOKENS_COLLECTION].update_one({"_id": holder.consumer}, {"$set": {"owner": "someone else"}})
+    holder.token = {"_data": "checkpoint"}
+    await holder.save_token()
+    assert holder.consumer == "test-host-1"
+    saved = await db.database[TOKENS_COLLECTION].find_one({"_id": "test-host-1"})
+    assert saved["token"] == {"_data": "checkpoint"}
+
+
+async def test_changes_invalidate_the_cache_and_update_the_index(replica_set):
+    running = watcher(replica_set)
+    running.start()
+    try:
+        await wait_for(lambda: running._token_loaded)
+        await asyncio.sleep(0.5)  # let the stream open before writing
+        generation = running.cache.generation("skills")
+        await replica_set.skills.insert({"id": "s1", "name": "Erlang", "category": "Languages"})
+        await wait_for(lambda: running.applied >= 1)
+        assert running.cache.generation("skills") > generation
+        total, hits = running.index.search("erlang")
+        assert total == 1 and hits[0]["id"] == "s1"
+    finally:
+        await running.stop()
+
+
+async def test_restarted_watcher_resumes_from_the_saved_token(replica_set):
+    first = watcher(replica_set)
+    first.start()
+    await wait_for(lambda: first._token_loaded)
+    await asyncio.sleep(0.5)
+    await replica_set.skills.insert({"id": "s1", "name": "Go"})
+    await wait_for(lambda: first.applied >= 1)
+    await first.stop()
+
+    # Written while no watcher is running
+    await replica_set.projects.insert({"id": "p1", "title": "Missed while down"})
+
+    restarted = watcher(replica_set)
+    restarted.start()
+    try:
+        await wait_for(lambda: restarted.applied >= 1)
+        assert restarted.consumer == first.consumer
+        assert restarted.cache.generation("projects") >= 1
+        assert restarted.resyncs == 0
+    finally:
+        await restarted.stop()
@@ -0,0 +1,67 @@
+"""
+Keyset cursors: round trips, and forged or malformed cursors rejected with 400.
+"""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from pagination import CREATED_AT_KEYSET, SKILLS_KEYSET, InvalidCursor, Keyset
+
+
+def forge(value, last_id="x"):
+    raw = json.dumps([value, last_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    created = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    cursor = CREATED_AT_KEYSET.encode({"id": "p1", "createdAt": created})
+    assert CREATED_AT_KEYSET.decode(cursor) == (created, "p1")
+    assert Keyset("year", -1).decode(Keyset("year", -1).encode({"id": "a1", "year": 2021})) == (2021, "a1")
+
+
+def test_aware_datetimes_become_naive_utc():
+    value, _ = CREATED_AT_KEYSET.decode(forge("2020-01-01T05:00:00+05:00"))
+    assert value == datetime(2020, 1, 1, 0, 0, 0) and value.tzinfo is None
+
+
+@pytest.mark.parametrize("cursor", [
+    forge({"$ne": None}),
+    forge({"$regex": "a"}),
+    forge(["a", "b"]),
+    forge("Languages", {"$gt": ""}),
+    forge("Languages", 5),
+    base64.urlsafe_b64encode(b'["only one"]').decode(),
+    base64.urlsafe_b64encode(b"not json").decode(),
+    "%%%",
+])
+def test_forged_or_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        SKILLS_KEYSET.decode(cursor)
+
+
+@pytest.mark.parametrize("value", [12, True, "yesterday", {"$gt": ""}])
+def test_datetime_cursor_must_be_an_iso_string(value):
+    with pytest.raises(InvalidCursor):
+        CREATED_AT_KEYSET.decode(forge(value))
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path, cursor", [
+    ("/api/projects", forge({"$ne": None})),
+    ("/api/skills", forge({"$regex": "a"})),
+    ("/api/skills", forge("Languages", {"$ne": None})),
+    ("/api/projects", forge("not a date")),
+])
+async def test_forged_cursors_get_400(api, path, cursor):
+    response = await api.get(path, params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_aware_datetime_cursor_pages(api):
+    response = await api.get("/api/projects", params={"limit": 2, "cursor": forge("2999-01-01T00:00:00+05:00")})
+    assert response.status_code == 200
+    assert response.json()["items"]
@@ -0,0 +1,23 @@
+"""
+Request profiling: bounded profile output.
+"""
+from collections import Counter
+
+from profiling import write_profile
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path):
+    for stamp in ("20240101T000003", "20240101T000001", "20240101T000004", "20240101T000002"):
+        write_profile(tmp_path, f"{stamp}-GET-api-skills", Counter({"main;handler": 3}), {"status": 200}, keep=2)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "20240101T000003-GET-api-skills.folded",
+        "20240101T000003-GET-api-skills.json",
+        "20240101T000004-GET-api-skills.folded",
+        "20240101T000004-GET-api-skills.json",
+    ]
+
+
+def test_keep_zero_means_no_limit(tmp_path):
+    for n in range(5):
+        write_profile(tmp_path, f"2024010{n}-GET", Counter(), {}, keep=0)
+    assert len(list(tmp_path.glob("*.json"))) == 5
@@ -0,0 +1,81 @@
+"""
+Full-text search: BM25 ranking, prefix matching and keeping the index current on writes.
+"""
+import pytest
+
+from search import SearchIndex
+
+
+def project(id, title, description="", technologies=()):
+    return {"id": id, "title": title, "description": description, "technologies": list(technologies)}
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.index("projects", project("title", "Kafka pipeline", "Streams events"))
+    index.index("projects", project("body", "Event store", "Replays events from kafka"))
+    index.index("projects", project("other", "Portfolio site", "React frontend"))
+    index.index("skills", {"id": "s1", "name": "Kubernetes", "description": "Operating kubernetes clusters"})
+    return index
+
+
+def ids(hits):
+    return [hit["id"] for hit in hits]
+
+
+def test_title_matches_outrank_description_matches(index):
+    total, hits = index.search("kafka")
+    assert total == 2
+    assert ids(hits) == ["title", "body"]
+    assert hits[0]["score"] > hits[1]["score"] > 0
+
+
+def test_rarer_terms_weigh_more(index):
+    # "events" is in two documents, "replays" in one
+    _, hits = index.search("replays events")
+    assert ids(hits)[0] == "body"
+
+
+def test_prefix_matches_rank_below_exact_matches(index):
+    index.index("skills", {"id": "s2", "name": "Kube", "description": "kube"})
+    total, hits = index.search("kube")
+    assert total == 2
+    assert ids(hits) == ["s2", "s1"]
+    assert index.search("kubern")[1][0]["id"] == "s1"
+    assert index.search("kubz") == (0, [])
+
+
+def test_collections_filter(index):
+    assert ids(index.search("kafka kubernetes", collections={"skills"})[1]) == ["s1"]
+
+
+def test_removed_and_replaced_documents_stop_matching(index):
+    index.remove("projects", "title")
+    assert ids(index.search("kafka")[1]) == ["body"]
+    index.index("projects", project("body", "Event store", "Replays events from a log"))
+    assert index.search("kafka") == (0, [])
+    assert index.search("pipeline") == (0, [])  # terms left with no documents are dropped
+    assert index.stats()["documents"] == 3
+
+
+@pytest.mark.anyio
+async def test_handlers_keep_the_index_current(api):
+    async def search(q):
+        return ids((await api.get("/api/search", params={"q": q})).json()["hits"])
+
+    created = await api.post("/api/projects", json={
+        "title": "Quokka tracker", "description": "Counts quokkas", "technologies": ["Rust"],
+        "category": "Personal", "status": "Completed", "type": "Personal",
+    })
+    project_id = created.json()["id"]
+    assert await search("quokka") == [project_id]
+
+    assert (await api.put(f"/api/projects/{project_id}", json={
+        "title": "Wombat tracker", "description": "Counts wombats",
+    })).status_code == 200
+    assert await search("quokka") == []
+    assert await search("wombat") == [project_id]
+
+    assert (await api.delete(f"/api/projects/{project_id}")).status_code == 200
+    assert await search("wombat") == []
@@ -0,0 +1,243 @@
+"""
+Conformance suite for the storage engines: every test runs against each one.
+
+The MongoDB engine runs on MONGO_URL when STORAGE_TEST_MONGO_URL is set
+(a scratch database is dropped afterwards), otherwise on mongomock-motor
+if it is installed.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import COLLECTION_NAMES, PortfolioDatabase
+from facets import facet_counts
+from pagination import Keyset
+from storage import DuplicateKeyError, Insert, MemoryStorage, SQLiteStorage, Upsert
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+PROJECTS = [
+    {"id": "p1", "title": "Search", "category": "Backend", "technologies": ["Python", "MongoDB"],
+     "isFeatured": True, "stars": 5, "createdAt": START},
+    {"id": "p2", "title": "Charts", "category": "Frontend", "technologies": ["React"],
+     "isFeatured": False, "stars": 12, "createdAt": START + timedelta(days=1)},
+    {"id": "p3", "title": "Pipelines", "category": "Backend", "technologies": ["Python", "Kafka"],
+     "isFeatured": False, "stars": 7, "createdAt": START + timedelta(days=1)},
+    {"id": "p4", "title": "Models", "category": "AI/ML", "technologies": ["Python"],
+     "isFeatured": True, "stars": 7, "createdAt": START + timedelta(days=2), "meta": {"team": "research"}},
+]
+
+
+# Where mongomock, unlike MongoDB and the other engines, gets it wrong
+MONGOMOCK_GAPS = {
+    "test_booleans_do_not_equal_numbers": "mongomock compares booleans and numbers as Python does",
+    "test_write_many": "mongomock reports bulk upsert indexes relative to the update batch",
+}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def mongo_storage(request):
+    url = os.environ.get("STORAGE_TEST_MONGO_URL")
+    if url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(url)
+    else:
+        mongomock_motor = pytest.importorskip("mongomock_motor")
+        client = mongomock_motor.AsyncMongoMockClient()
+        reason = MONGOMOCK_GAPS.get(request.function.__name__)
+        if reason:
+            request.applymarker(pytest.mark.xfail(reason=reason, strict=True))
+    name = f"storage_conformance_{uuid.uuid4().hex[:8]}"
+    storage = PortfolioDatabase(client, name)
+    for collection_name in COLLECTION_NAMES:
+        await storage.database[collection_name].create_index("id", unique=True)
+    return storage, lambda: client.drop_database(name)
+
+
+@pytest.fixture(params=["memory", "sqlite", "mongo"])
+async def storage(request, tmp_path):
+    cleanup = None
+    if request.param == "memory":
+        storage = MemoryStorage(COLLECTION_NAMES)
+    elif request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "conformance.sqlite3", COLLECTION_NAMES)
+    else:
+        storage, cleanup = await mongo_storage(request)
+    yield storage
+    if cleanup is not None:
+        await cleanup()
+    storage.close()
+
+
+@pytest.fixture
+async def projects(storage):
+    result = await storage.projects.write_many([Insert(dict(project)) for project in PROJECTS])
+    assert result["inserted"] == len(PROJECTS) and not result["errors"]
+    return storage.projects
+
+
+def ids(documents):
+    return [document["id"] for document in documents]
+
+
+def without_mongo_id(document):
+    return {key: value for key, value in document.items() if key != "_id"}
+
+
+async def test_insert_and_find_one(storage):
+    await storage.skills.insert({"id": "s1", "name": "Python", "level": 90, "createdAt": START})
+    found = await storage.skills.find_one({"id": "s1"})
+    assert without_mongo_id(found) == {"id": "s1", "name": "Python", "level": 90, "createdAt": START}
+    assert await storage.skills.find_one({"id": "missing"}) is None
+
+
+async def test_duplicate_id_is_rejected(storage):
+    await storage.skills.insert({"id": "s1", "name": "Python"})
+    with pytest.raises(DuplicateKeyError):
+        await storage.skills.insert({"id": "s1", "name": "Go"})
+    assert await storage.skills.count() == 1
+
+
+async def test_returned_documents_are_copies(projects):
+    document = await projects.find_one({"id": "p1"})
+    document["technologies"].append("Rust")
+    assert (await projects.find_one({"id": "p1"}))["technologies"] == ["Python", "MongoDB"]
+
+
+async def test_find_filters(projects):
+    assert ids(await projects.find({"category": "Backend"}, sort=[("id", 1)])) == ["p1", "p3"]
+    assert ids(await projects.find({"technologies": "Python"}, sort=[("id", 1)])) == ["p1", "p3", "p4"]
+    assert ids(await projects.find({"technologies": {"$in": ["React", "Kafka"]}}, sort=[("id", 1)])) == ["p2", "p3"]
+    assert ids(await projects.find({"isFeatured": True}, sort=[("id", 1)])) == ["p1", "p4"]
+    assert ids(await projects.find({"stars": {"$gte": 7, "$lt": 12}}, sort=[("id", 1)])) == ["p3", "p4"]
+    assert ids(await projects.find({"createdAt": {"$gt": START}}, sort=[("id", 1)])) == ["p2", "p3", "p4"]
+    assert ids(await projects.find({"category": {"$ne": "Backend"}}, sort=[("id", 1)])) == ["p2", "p4"]
+    assert ids(await projects.find({"meta.team": "research"})) == ["p4"]
+    assert ids(await projects.find({"meta": {"$exists": False}}, sort=[("id", 1)])) == ["p1", "p2", "p3"]
+    assert ids(await projects.find({"$or": [{"stars": 12}, {"category": "AI/ML"}]}, sort=[("id", 1)])) == ["p2", "p4"]
+    assert ids(await projects.find({"$and": [{"technologies": "Python"}, {"isFeatured": False}]})) == ["p3"]
+    assert ids(await projects.find({"id": {"$in": ["p4", "p2", "nope"]}}, sort=[("id", 1)])) == ["p2", "p4"]
+
+
+async def test_booleans_do_not_equal_numbers(projects):
+    assert await projects.find({"isFeatured": 1}) == []
+
+
+async def test_sort_and_limit(projects):
+    assert ids(await projects.find(sort=[("stars", -1), ("id", 1)])) == ["p2", "p3", "p4", "p1"]
+    assert ids(await projects.find(sort=[("createdAt", -1), ("id", -1)], limit=3)) == ["p4", "p3", "p2"]
+    assert ids(await projects.find(sort=[("category", 1), ("createdAt", 1)])) == ["p4", "p1", "p3", "p2"]
+    assert len(await projects.find(limit=2)) == 2
+
+
+async def test_sort_puts_missing_values_first(projects):
+    await projects.insert({"id": "p5", "title": "Draft"})
+    assert ids(await projects.find(sort=[("stars", 1), ("id", 1)]))[:2] == ["p5", "p1"]
+
+
+async def test_projection(projects):
+    (document,) = await projects.find({"id": "p1"}, {"title": 1, "id": 1, "_id": 0})
+    assert document == {"id": "p1", "title": "Search"}
+    excluded = without_mongo_id(await projects.find_one({"id": "p4"}, {"meta": 0, "technologies": 0}))
+    assert set(excluded) == {"id", "title", "category", "isFeatured", "stars", "createdAt"}
+
+
+async def test_keyset_pages(projects):
+    keyset = Keyset("createdAt", -1, is_datetime=True)
+    seen, cursor = [], None
+    while True:
+        query = keyset.after(cursor) if cursor else {}
+        page = await projects.find(query, sort=keyset.sort, limit=2)
+        seen += ids(page)
+        if len(page) < 2:
+            break
+        cursor = keyset.encode(page[-1])
+    assert seen == ["p4", "p3", "p2", "p1"]
+
+
+async def test_update(projects):
+    updated = await projects.update({"id": "p2"}, {"title": "Dashboards", "stars": 13})
+    assert updated["title"] == "Dashboards" and updated["stars"] == 13 and updated["category"] == "Frontend"
+    assert (await projects.find_one({"id": "p2"}))["title"] == "Dashboards"
+    assert await projects.update({"id": "missing"}, {"title": "x"}) is None
+
+
+async def test_upsert(storage):
+    skills = storage.skills
+    assert await skills.upsert({"name": "Go"}, {"level": 60}, {"id": "s-go", "createdAt": START}) is True
+    assert without_mongo_id(await skills.find_one({"name": "Go"})) == {
+        "name": "Go", "level": 60, "id": "s-go", "createdAt": START,
+    }
+    assert await skills.upsert({"name": "Go"}, {"level": 70}, {"id": "other", "createdAt": START}) is False
+    document = await skills.find_one({"name": "Go"})
+    assert document["level"] == 70 and document["id"] == "s-go"
+    assert await skills.count() == 1
+
+
+async def test_write_many(storage):
+    skills = storage.skills
+    await skills.insert({"id": "s1", "name": "Python", "level": 80})
+    result = await skills.write_many([
+        Insert({"id": "s2", "name": "Go", "level": 50}),
+        Insert({"id": "s1", "name": "Duplicate"}),
+        Upsert({"id": "s1"}, {"level": 85}),
+        Upsert({"id": "s3"}, {"name": "Rust", "level": 40}, {"createdAt": START}),
+        Upsert({"id": "s2"}, {"level": 50}),
+    ])
+    assert (result["inserted"], result["upserted"], result["matched"], result["modified"]) == (1, 1, 2, 1)
+    assert result["created"] == [3]
+    assert list(result["errors"]) == [1]
+    assert sorted(ids(await skills.find())) == ["s1", "s2", "s3"]
+    assert (await skills.find_one({"id": "s1"}))["level"] == 85
+    assert (await skills.find_one({"id": "s3"}))["createdAt"] == START
+
+
+async def test_delete_count_and_clear(projects):
+    assert await projects.count() == 4
+    assert await projects.count({"technologies": "Python"}) == 3
+    assert await projects.delete({"id": "p1"}) is True
+    assert await projects.delete({"id": "p1"}) is False
+    assert await projects.count() == 3
+    await projects.clear()
+    assert await projects.count() == 0 and await projects.find() == []
+
+
+async def test_stream(projects):
+    streamed = [document async for document in projects.stream({"category": "Backend"}, {"_id": 0}, batch_size=1)]
+    assert sorted(ids(streamed)) == ["p1", "p3"]
+
+
+async def test_datetimes_are_stored_to_the_millisecond(storage):
+    await storage.education.insert({"id": "e1", "createdAt": START.replace(microsecond=123456)})
+    assert (await storage.education.find_one({"id": "e1"}))["createdAt"] == START.replace(microsecond=123000)
+
+
+async def test_facet_counts(projects):
+    counts = await facet_counts(projects, {"technologies": ["Python"], "isFeatured": [True]})
+    assert counts["category"] == {"AI/ML": 1, "Backend": 1}
+    assert counts["isFeatured"] == {"false": 1, "true": 2}
+    assert counts["technologies"] == {"Python": 2, "MongoDB": 1}
+    assert list(counts["status"]) == []
+
+
+async def test_sqlite_sees_writes_from_other_connections(tmp_path):
+    path = tmp_path / "shared.sqlite3"
+    first, second = SQLiteStorage(path, COLLECTION_NAMES), SQLiteStorage(path, COLLECTION_NAMES)
+    try:
+        await first.skills.insert({"id": "s1", "level": 1})
+        assert (await second.skills.find_one({"id": "s1"}))["level"] == 1
+        await first.skills.update({"id": "s1"}, {"level": 2})
+        await first.skills.insert({"id": "s2", "level": 3})
+        assert (await second.skills.find_one({"id": "s1"}))["level"] == 2
+        assert await second.skills.count() == 2
+    finally:
+        first.close()
+        second.close()